@@ -0,0 +1,34 @@
+"""Shared setup for the benchmarks: points watcher.py at a scratch directory and imports it."""
+import os, sys, tempfile, time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_watcher(workdir=None, **env):
+    """Imports watcher with its required ENV pointed into `workdir`, extra ENV overrides are applied first."""
+    workdir = workdir or tempfile.mkdtemp(prefix="unciv-mailer-bench-")
+    os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+    defaults = {
+        "WATCH_DIR": os.path.join(workdir, "data"),
+        "MAIL_MAP_FILE": os.path.join(workdir, "mail_map.json"),
+        "FILE_STATE_PATH": os.path.join(workdir, "file_states.json"),
+        "SMTP_USER": "unciv@bench.local",
+        "SMTP_USER_FROM": "Unciv-Mailer",
+        "SMTP_PASS": "password",
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": "465",
+        "SMTP_ERROR_ADDR": "error@bench.local",
+        "LOG_LEVEL": "WARNING",
+    }
+    os.environ.update({**defaults, **{k: str(v) for k, v in env.items()}})
+    sys.path.insert(0, REPO_DIR)
+    import watcher
+    return watcher
+
+
+def timeit(fn, repeat):
+    """Returns the mean seconds per call of fn over `repeat` calls."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
@@ -0,0 +1,65 @@
+"""
+Decode cost of preview and full-game saves as civilizations and map size grow.
+
+"preview" is decode_preview() as watcher.py calls it: saves up to
+DECODE_BUFFER_LIMIT are decoded whole, larger ones are streamed. "stream" always
+runs the chunked base64 -> gzip -> JSON scan of PreviewScanner, "full" decodes
+the whole file into memory and json.loads it. Memory is the tracemalloc peak
+of one decode.
+
+    python3 bench/decode.py [--civs N ...] [--tiles N ...] [--repeat N]
+"""
+import argparse, base64, gzip, json, os, tracemalloc
+
+from common import load_watcher, timeit
+from saves import new_game, preview_doc, game_doc, encode_save
+
+
+def full_decode(path):
+    with open(path, "rb") as f:
+        return json.loads(gzip.decompress(base64.b64decode(f.read())))
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--civs", type=int, nargs="+", default=[2, 8, 32])
+    parser.add_argument("--tiles", type=int, nargs="+", default=[500, 5000, 50000], help="tile counts of the full-game saves")
+    parser.add_argument("--repeat", type=int, default=20, help="decodes measured per file")
+    args = parser.parse_args()
+
+    watcher = load_watcher()
+    cases = []
+    for civs in args.civs:
+        game = new_game(civs, seed=civs)
+        # The current player is the last civ, so the scan can't stop before the end of the list
+        turn = civs - 1
+        cases.append((f"preview civs={civs}", preview_doc(game, turn)))
+        for tiles in args.tiles:
+            cases.append((f"game civs={civs} tiles={tiles}", game_doc(game, turn, tiles)))
+
+    print(f"{'save':<28} {'size':>10} {'preview':>11} {'stream':>11} {'full':>11} {'preview peak':>13} {'full peak':>11}")
+    for name, doc in cases:
+        path = os.path.join(watcher.WATCH_DIR, "bench_Preview")
+        with open(path, "wb") as f:
+            f.write(encode_save(doc))
+        assert watcher.decode_preview(path)["currentPlayer"] == doc["currentPlayer"]
+        preview = timeit(lambda: watcher.decode_preview(path), args.repeat)
+        stream = timeit(lambda: watcher.PreviewScanner(watcher.read_save_text(path)).scan(), args.repeat)
+        full = timeit(lambda: full_decode(path), args.repeat)
+        preview_peak = peak_memory(lambda: watcher.decode_preview(path))
+        full_peak = peak_memory(lambda: full_decode(path))
+        print(f"{name:<28} {os.path.getsize(path) / 1024:>7.0f} KB {preview * 1e3:>8.2f} ms {stream * 1e3:>8.2f} ms"
+              f" {full * 1e3:>8.2f} ms {preview_peak / 2**20:>10.2f} MB {full_peak / 2**20:>8.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+End-to-end throughput and latency of watcher.py under turn-end bursts.
+
+Starts watcher.py through the same start() as its __main__, with watch() in a
+thread, against a temporary WATCH_DIR and a local stub SMTP server
+(bench/smtp_stub.py), then writes a burst of turn ends: for every game the full save followed by its preview, as
+the Unciv server does. Latency is measured from closing a preview to the stub
+server receiving its mail, so it includes the WATCH_DEBOUNCE window.
+
+Nothing leaves the machine. The stub speaks plain SMTP, so smtplib.SMTP_SSL is
+swapped for smtplib.SMTP in this process only.
+
+    python3 bench/pipeline.py [--games N ...] [--bursts N] [--workers N]
+"""
+import argparse, json, math, os, queue, resource, re, smtplib, threading, time
+
+import smtp_stub
+from common import load_watcher
+from saves import new_game, preview_doc, game_doc, encode_save
+
+STAGE_SUM = re.compile(r'^unciv_mailer_stage_seconds_(sum|count)\{stage="(read|decode|parse)"\} (\S+)$', re.M)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[max(math.ceil(q * len(values)) - 1, 0)]
+
+
+def decode_totals(watcher):
+    """Seconds and count of read+decode+parse so far, taken from the metrics exposition."""
+    totals = {"sum": 0.0, "count": 0}
+    for kind, stage, value in STAGE_SUM.findall(watcher.metrics.render()):
+        if kind == "sum":
+            totals["sum"] += float(value)
+        elif stage == "decode":
+            totals["count"] += int(value)
+    return totals["sum"], totals["count"]
+
+
+def write_save(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def run_burst(watcher, games, turn, full_saves, deliveries, timeout):
+    """Writes one turn end for every game and waits for all their mails. Returns (latencies, seconds)."""
+    previews = []
+    for game in games:
+        doc = preview_doc(game, turn)
+        player = next(civ for civ in game["civilizations"] if civ["civName"] == doc["currentPlayer"])
+        previews.append((game["gameId"], encode_save(doc), f"{player['playerId']}@bench.local"))
+
+    written = {}
+    start = time.monotonic()
+    for game_id, preview, recipient in previews:
+        write_save(os.path.join(watcher.WATCH_DIR, game_id), full_saves[game_id])
+        write_save(os.path.join(watcher.WATCH_DIR, game_id + "_Preview"), preview)
+        written[recipient] = time.monotonic()
+
+    latencies = []
+    last = start
+    deadline = start + timeout
+    while written:
+        try:
+            recipients, received = deliveries.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            print(f"  timed out waiting for {len(written)} mails")
+            break
+        for recipient in recipients:
+            if recipient in written:
+                latencies.append(received - written.pop(recipient))
+                last = max(last, received)
+    return latencies, last - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, nargs="+", default=[10, 100, 1000], help="concurrent games per burst")
+    parser.add_argument("--bursts", type=int, default=3, help="turn-end bursts per game count")
+    parser.add_argument("--civs", type=int, default=4, help="civilizations per game")
+    parser.add_argument("--tiles", type=int, default=500, help="tiles of the full-game saves")
+    parser.add_argument("--workers", type=int, default=2, help="SMTP_WORKERS")
+    parser.add_argument("--debounce", type=float, default=0.5, help="WATCH_DEBOUNCE")
+    parser.add_argument("--smtp-delay", type=float, default=0.0, help="seconds the stub server takes per mail")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for the mails of one burst")
+    args = parser.parse_args()
+
+    # Started before watcher spawns any threads, so the stub process is forked from a clean state
+    port, stub, deliveries = smtp_stub.start(args.smtp_delay)
+    watcher = load_watcher(SMTP_PORT=port, SMTP_WORKERS=args.workers, WATCH_DEBOUNCE=args.debounce)
+    smtplib.SMTP_SSL = smtplib.SMTP
+
+    games = [new_game(args.civs, seed=i) for i in range(max(args.games))]
+    mail_map = {civ["playerId"]: f"{civ['playerId']}@bench.local" for game in games for civ in game["civilizations"]}
+    with open(watcher.MAIL_MAP_FILE, "w") as f:
+        json.dump(mail_map, f)
+    # The watcher ignores full saves, so one encoding per game is enough to reproduce the writes
+    full_saves = {game["gameId"]: encode_save(game_doc(game, 0, args.tiles)) for game in games}
+
+    mail_map = watcher.load_mail_map({})
+    catch_up_thread = watcher.start(mail_map)
+    threading.Thread(target=watcher.watch, args=(mail_map,), name="watch", daemon=True).start()
+    time.sleep(1)
+
+    print(f"WATCH_DEBOUNCE={args.debounce}s SMTP_WORKERS={args.workers} civs={args.civs} tiles={args.tiles}")
+    print(f"{'games':>6} {'events/s':>9} {'decode':>10} {'p50':>9} {'p99':>9} {'max':>9} {'peak RSS':>9}")
+    turn = 0
+    try:
+        for count in args.games:
+            latencies, seconds = [], 0.0
+            decode_before = decode_totals(watcher)
+            for _ in range(args.bursts):
+                turn += 1
+                burst, elapsed = run_burst(watcher, games[:count], turn, full_saves, deliveries, args.timeout)
+                latencies += burst
+                seconds += elapsed
+            decode_sum, decode_count = (after - before for after, before in zip(decode_totals(watcher), decode_before))
+            if not latencies:
+                print(f"{count:>6} no mails delivered")
+                continue
+            decode = decode_sum / decode_count if decode_count else 0.0
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(f"{count:>6} {len(latencies) / seconds:>9.1f} {decode * 1e3:>7.2f} ms"
+                  f" {percentile(latencies, 0.5) * 1e3:>6.0f} ms {percentile(latencies, 0.99) * 1e3:>6.0f} ms"
+                  f" {max(latencies) * 1e3:>6.0f} ms {rss:>6.0f} MB")
+    finally:
+        watcher.shutdown(catch_up_thread)
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Synthetic Unciv multiplayer saves, written the way the Unciv server stores them:
+gzip-compressed JSON, base64-encoded, as `<gameId>` (full game) and `<gameId>_Preview`.
+
+The preview holds the same top-level fields as a real one, the full game adds a
+tile map and per-civilization state so its size can be scaled with `tiles`.
+"""
+import base64, gzip, json, random, uuid
+
+NATIONS = ["Rome", "Babylon", "Egypt", "Greece", "China", "Mongolia", "Aztecs", "England", "France", "Russia",
+           "Persia", "Polynesia", "Siam", "Songhai", "Zulu", "Korea", "America", "Arabia", "Japan", "India"]
+TERRAINS = ["Grassland", "Plains", "Desert", "Tundra", "Snow", "Ocean", "Coast", "Mountain"]
+FEATURES = ["Forest", "Jungle", "Hill", "Marsh", "Oasis"]
+
+
+def new_game(civs=4, seed=None):
+    """Returns the static part of a game: its id and the civilizations with their player ids."""
+    rng = random.Random(seed)
+    game_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    civilizations = [
+        {"civName": NATIONS[i % len(NATIONS)] + ("" if i < len(NATIONS) else f" {i // len(NATIONS)}"),
+         "playerType": "Human",
+         "playerId": str(uuid.UUID(int=rng.getrandbits(128)))}
+        for i in range(civs)
+    ]
+    return {"gameId": game_id, "civilizations": civilizations}
+
+
+def preview_doc(game, turn):
+    civs = game["civilizations"]
+    return {
+        "gameParameters": {
+            "difficulty": "Prince", "speed": "Standard", "players": [
+                {"chosenCiv": civ["civName"], "playerType": civ["playerType"], "playerId": civ["playerId"]} for civ in civs
+            ], "victoryTypes": ["Cultural", "Diplomatic", "Domination", "Scientific"], "isOnlineMultiplayer": True,
+        },
+        "civilizations": [
+            {"civName": civ["civName"], "playerType": civ["playerType"], "playerId": civ["playerId"], "isDefeated": False}
+            for civ in civs
+        ],
+        "turns": turn,
+        "currentPlayer": civs[turn % len(civs)]["civName"],
+        "currentTurnStartTime": 1760000000000 + turn * 60000,
+        "gameId": game["gameId"],
+        "version": {"number": 4, "createdWith": {"text": "4.13.7", "number": 1013}},
+    }
+
+
+def game_doc(game, turn, tiles=2000, seed=0):
+    """The full game file: the preview fields plus a tile map and per-civ state sized by `tiles`."""
+    rng = random.Random(seed)
+    doc = preview_doc(game, turn)
+    for civ in doc["civilizations"]:
+        civ.update({
+            "gold": rng.randint(0, 2000),
+            "tech": {"techsResearched": rng.sample(range(80), 30)},
+            "exploredTiles": [[rng.randint(-40, 40), rng.randint(-40, 40)] for _ in range(tiles // 4)],
+            "notifications": [{"text": f"Turn {turn}: something happened", "icons": ["StatIcons/Gold"]} for _ in range(10)],
+        })
+    doc["tileMap"] = {
+        "mapParameters": {"shape": "Hexagonal", "mapSize": {"radius": int((tiles / 3) ** 0.5)}},
+        "tileList": [
+            {"position": {"x": rng.randint(-40, 40), "y": rng.randint(-40, 40)},
+             "baseTerrain": rng.choice(TERRAINS),
+             "terrainFeatures": rng.sample(FEATURES, rng.randint(0, 2)),
+             "resource": rng.choice([None, "Iron", "Horses", "Wheat", "Gold Ore"]),
+             "improvement": rng.choice([None, "Farm", "Mine", "Road"])}
+            for _ in range(tiles)
+        ],
+    }
+    # Unciv puts the map in front of the bookkeeping fields, so readers have to skip it
+    return {"gameParameters": doc.pop("gameParameters"), "tileMap": doc.pop("tileMap"), **doc}
+
+
+def encode_save(doc):
+    return base64.b64encode(gzip.compress(json.dumps(doc).encode()))
@@ -0,0 +1,87 @@
+"""
+Minimal SMTP server for the benchmarks. It speaks just enough of RFC 5321 for
+smtplib (EHLO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT), accepts every mail
+and reports each delivery with its CLOCK_MONOTONIC receive time.
+
+It runs in its own process so it doesn't compete with watcher.py for the GIL.
+"""
+import base64, multiprocessing, socketserver, time
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 bench.local ESMTP stub")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, arg = line.decode().strip().partition(" ")
+            command = command.upper()
+            if command in ("EHLO", "HELO"):
+                self.wfile.write(b"250-bench.local\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif command == "AUTH":
+                mechanism, _, initial = arg.partition(" ")
+                if mechanism.upper() == "LOGIN":
+                    for prompt in (b"Username:", b"Password:"):
+                        self.reply("334 " + base64.b64encode(prompt).decode())
+                        self.rfile.readline()
+                elif not initial:
+                    self.reply("334 ")
+                    self.rfile.readline()
+                self.reply("235 2.7.0 Authentication successful")
+            elif command == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                recipients.append(arg.partition(":")[2].strip().strip("<>"))
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                if self.server.delay:
+                    time.sleep(self.server.delay)
+                self.server.deliveries.put((recipients, time.monotonic()))
+                self.reply("250 OK queued")
+            elif command in ("RSET", "NOOP"):
+                recipients = [] if command == "RSET" else recipients
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start(delay=0.0):
+    """
+    Starts the server on a free localhost port in a child process.
+    Returns (port, process, deliveries) where deliveries yields (recipients, monotonic receive time).
+    """
+    deliveries = multiprocessing.Queue()
+    ready = multiprocessing.Event()
+    port = multiprocessing.Value("i", 0)
+    process = multiprocessing.Process(target=_run, args=(port, ready, deliveries, delay), daemon=True)
+    process.start()
+    if not ready.wait(10):
+        raise RuntimeError("SMTP stub did not start")
+    return port.value, process, deliveries
+
+
+def _run(port, ready, deliveries, delay):
+    with SMTPServer(("127.0.0.1", 0), SMTPHandler) as server:
+        server.deliveries = deliveries
+        server.delay = delay
+        port.value = server.server_address[1]
+        ready.set()
+        server.serve_forever()
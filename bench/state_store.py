@@ -0,0 +1,48 @@
+"""
+Cost of recording one file state as the number of tracked games grows.
+
+Compares the append-only StateLog used by watcher.py with rewriting the whole
+file_states dict via json.dump, which is what per-update durability would cost
+with the old save_data().
+
+    python3 bench/state_store.py [--updates N]
+"""
+import argparse, json, os
+
+from common import load_watcher, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=2000, help="updates measured per size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000, 10000])
+    args = parser.parse_args()
+
+    watcher = load_watcher()
+    print(f"{'games':>8} {'journal append':>16} {'append+fsync':>14} {'json.dump rewrite':>18}")
+    for size in args.sizes:
+        states = {f"game-{i}": {"nation": "Rome", "turn": i, "fingerprints": {f"game-{i}_Preview": [i, 4096, i, None]}} for i in range(size)}
+        log = watcher.StateLog(os.path.join(os.path.dirname(os.environ["FILE_STATE_PATH"]), f"journal-{size}"))
+        log.compact(states)
+        counter = iter(range(10**9))
+
+        def update():
+            n = next(counter) % size
+            log.append(f"game-{n}", {"nation": "Rome", "turn": n + 1, "fingerprints": states[f"game-{n}"]["fingerprints"]})
+
+        def update_synced():
+            update()
+            log.sync()
+
+        def rewrite():
+            with open(log.path + ".json", "w") as f:
+                json.dump(states, f)
+
+        append = timeit(update, args.updates)
+        synced = timeit(update_synced, max(args.updates // 10, 1))
+        dump = timeit(rewrite, max(args.updates // 50, 1))
+        print(f"{size:>8} {append * 1e6:>13.1f} us {synced * 1e6:>11.1f} us {dump * 1e6:>15.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Per-message construction cost of a turn notification.
+
+"legacy" rebuilds everything per mail like send_mail() used to: formats both
+bodies and re-creates the two image parts from the base64 literals.
+"compiled" renders the precompiled MailTemplates, which return the flattened
+message with the image parts serialized once, so building already includes flattening.
+"legacy" is measured with and without flattening the message to bytes, as spool_mail() does.
+
+    python3 bench/templates.py [--repeat N]
+"""
+import argparse
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.mime.base import MIMEBase
+
+from common import load_watcher, timeit
+
+VALUES = {"nation": "Babylon", "turn": 42, "since": "17.10.2026 12:00:00", "gameId": "5c0b5d4e-6f7a-4b8c-9d0e-1f2a3b4c5d6e"}
+
+
+def legacy_build(watcher, recipient, values):
+    msg = MIMEMultipart('alternative')
+    msg["Subject"] = "Unciv - It's your turn!"
+    msg["From"] = watcher.SMTP_USER_FROM
+    msg["To"] = recipient
+    plain, html = watcher.DEFAULT_PLAIN_TEMPLATE, watcher.DEFAULT_HTML_TEMPLATE
+    for field, value in values.items():
+        plain = plain.replace(f"${field}", str(value))
+        html = html.replace(f"${field}", str(value))
+    msg.attach(MIMEText(plain, 'plain'))
+    msg.attach(MIMEText(html, 'html'))
+    for cid, img in (("uncivlogo", watcher.UNCIV_IMG), ("githublogo", watcher.GITHUB_IMG)):
+        part = MIMEBase('image', 'png')
+        part.set_payload(img)
+        part.add_header('Content-ID', f'<{cid}>')
+        part.add_header('Content-Transfer-Encoding', 'base64')
+        msg.attach(part)
+    return msg
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    watcher = load_watcher()
+    legacy = lambda: legacy_build(watcher, "player@bench.local", VALUES)
+    compiled = lambda: watcher.templates.build("player@bench.local", VALUES)
+    cases = {
+        "legacy": (legacy, lambda: legacy().as_bytes()),
+        "compiled": (compiled, compiled),
+    }
+    print(f"{'builder':>10} {'build':>12} {'build+flatten':>15}")
+    for name, (build, flatten) in cases.items():
+        built = timeit(build, args.repeat)
+        flattened = timeit(flatten, args.repeat)
+        print(f"{name:>10} {built * 1e6:>9.1f} us {flattened * 1e6:>12.1f} us")
+
+
+if __name__ == "__main__":
+    main()
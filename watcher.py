@@ -1,14 +1,23 @@
-import os, base64, gzip, json, smtplib
-from email.mime.multipart import MIMEMultipart
+import os, base64, json, smtplib
+import zlib, codecs, re, html
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
-from email.message import EmailMessage
-import subprocess
+from email.message import EmailMessage, Message
+from email import encoders
+from email.parser import BytesHeaderParser
+from email.utils import getaddresses
+import subprocess, select, struct
+import ctypes, ctypes.util
 import logging
 from datetime import datetime, timezone
 import hashlib
 import traceback, time
 import sys, signal
+import threading, queue, heapq
+import random, uuid
+import multiprocessing, contextlib, functools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ProcessPoolExecutor
 
 
 numeric_level = getattr(logging, os.environ.get("LOG_LEVEL", "INFO").upper(), None)
@@ -30,8 +39,323 @@ SMTP_HOST = os.environ["SMTP_HOST"]
 SMTP_PORT = os.environ["SMTP_PORT"]
 SMTP_ERROR_ADDR = os.environ["SMTP_ERROR_ADDR"]
 
+# Optional ENV
+SMTP_WORKERS = int(os.environ.get("SMTP_WORKERS", 2))
+SMTP_POOL_SIZE = int(os.environ.get("SMTP_POOL_SIZE", SMTP_WORKERS))
+SMTP_IDLE_TIMEOUT = float(os.environ.get("SMTP_IDLE_TIMEOUT", 60))
+MAIL_QUEUE_SIZE = int(os.environ.get("MAIL_QUEUE_SIZE", 256))
+SMTP_RATE = float(os.environ.get("SMTP_RATE", 0))
+SMTP_BURST = int(os.environ.get("SMTP_BURST", 5))
+DIGEST_WINDOW = float(os.environ.get("DIGEST_WINDOW", 0))
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+METRICS_ADDR = os.environ.get("METRICS_ADDR", "127.0.0.1")
+SPOOL_DIR = os.environ.get("SPOOL_DIR", os.path.join(os.path.dirname(FILE_STATE_PATH), "outbox"))
+SPOOL_FAILED_DIR = os.path.join(SPOOL_DIR, "failed")
+# Notifications held for a digest, one JSON file each until their digest is spooled
+DIGEST_DIR = os.path.join(SPOOL_DIR, "digest")
+SPOOL_RETRY_BASE = float(os.environ.get("SPOOL_RETRY_BASE", 10))
+SPOOL_RETRY_MAX = float(os.environ.get("SPOOL_RETRY_MAX", 3600))
+# Picks up spool entries that were not scheduled in this process
+SPOOL_SCAN_INTERVAL = 60
+
+TEMPLATE_FILES = {
+    "plain": "mail.txt", "html": "mail.html",
+    "digest_plain": "digest.txt", "digest_html": "digest.html",
+    "digest_plain_row": "digest_row.txt", "digest_html_row": "digest_row.html",
+    "uncivlogo": "unciv.png", "githublogo": "github.png",
+}
+
+# Top-level save fields needed for a notification, see decode_preview()
+PREVIEW_FIELDS = ("currentPlayer", "turns", "gameId", "currentTurnStartTime")
+DECODE_CHUNK_SIZE = 64 * 1024
+# Saves up to this size on disk are decoded in one go, the streaming scanner only pays off in memory above it
+DECODE_BUFFER_LIMIT = 256 * 1024
+FINGERPRINT_HASH = os.environ.get("FINGERPRINT_HASH", "false").lower() in ("1", "true", "yes")
+STATE_SYNC_INTERVAL = float(os.environ.get("STATE_SYNC_INTERVAL", 1))
+# Journals below this many records are never compacted
+STATE_COMPACT_MIN = 1024
+SCAN_WORKERS = int(os.environ.get("SCAN_WORKERS", min(os.cpu_count() or 1, 4)))
+# Catch-ups with less to decode than this run in-process, starting the pool would cost more
+SCAN_POOL_MIN_BYTES = 4 * 1024 * 1024
+TEMPLATE_DIR = os.environ.get("TEMPLATE_DIR", os.path.dirname(MAIL_MAP_FILE))
+WATCH_BACKEND = os.environ.get("WATCH_BACKEND", "native")
+WATCH_DEBOUNCE = float(os.environ.get("WATCH_DEBOUNCE", 0.5))
+WATCH_TICK = WATCH_DEBOUNCE / 2 or 1
+# A watcher running this long before failing starts its restart backoff over
+WATCH_RESTART_RESET = 600
+WATCH_RESTART_NOTIFY = 3
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+INOTIFY_EVENT = struct.Struct("iIII")
+INOTIFY_BUFFER_SIZE = 64 * 1024
+
+# Errors after which the SMTP session is still in a usable state
+SMTP_SESSION_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
 mail_map_mtime = None
 file_states = {}
+# Guards file_states, which the watcher and the startup catch-up scan update concurrently
+state_lock = threading.RLock()
+delivery_workers = []
+
+
+# name -> (type, help) of everything exported on the metrics endpoint
+METRICS = {
+    "unciv_mailer_events_total": ("counter", "inotify events received for _Preview files"),
+    "unciv_mailer_events_coalesced_total": ("counter", "Events merged into an already pending one by the debounce"),
+    "unciv_mailer_files_skipped_total": ("counter", "Files skipped because their fingerprint was unchanged"),
+    "unciv_mailer_decode_errors_total": ("counter", "Saves that could not be decoded"),
+    "unciv_mailer_process_errors_total": ("counter", "Files that failed to process for other reasons, e.g. spool or template errors"),
+    "unciv_mailer_mails_total": ("counter", "Mail delivery attempts by result"),
+    "unciv_mailer_stage_seconds": ("histogram", "Time spent per processing stage"),
+    "unciv_mailer_event_to_mail_seconds": ("histogram", "Time from the first inotify event of a turn to its delivered mail"),
+    "unciv_mailer_mail_queue_depth": ("gauge", "Spooled mails waiting for a delivery worker"),
+    "unciv_mailer_spool_depth": ("gauge", "Mails in the outbox, including scheduled retries"),
+    "unciv_mailer_watch_pending": ("gauge", "Files waiting for their debounce window to pass"),
+    "unciv_mailer_digest_recipients": ("gauge", "Recipients with a held digest"),
+    "unciv_mailer_tracked_games": ("gauge", "Games in file_states"),
+}
+METRIC_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+
+
+class Metrics:
+    """Counters, histograms and gauges of this process, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (name, labels) -> value, or [bucket counts, sum, count] for histograms
+        self._values = {}
+        self._gauges = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._values.setdefault(key, [[0] * len(METRIC_BUCKETS), 0.0, 0])
+            for i, bound in enumerate(METRIC_BUCKETS):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    @contextlib.contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("unciv_mailer_stage_seconds", time.perf_counter() - start, stage=stage)
+
+    def gauge(self, name, read):
+        self._gauges[name] = read
+
+    def render(self):
+        with self._lock:
+            values = { key: (value if not isinstance(value, list) else [list(value[0]), value[1], value[2]]) for key, value in self._values.items() }
+        for name, read in self._gauges.items():
+            values[(name, ())] = read()
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            series = sorted((labels, value) for (key, labels), value in values.items() if key == name)
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in series:
+                if kind != "histogram":
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+                    continue
+                buckets, total, count = value
+                for bound, bucket in zip(METRIC_BUCKETS, buckets):
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', bound),))} {bucket}")
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{format_labels(labels)} {total}")
+                lines.append(f"{name}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"Metrics request from {self.address_string()}: {format % args}")
+
+
+def start_metrics_server():
+    server = ThreadingHTTPServer((METRICS_ADDR, METRICS_PORT), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logging.info(f"Serving metrics on http://{METRICS_ADDR}:{METRICS_PORT}/metrics")
+
+
+metrics = Metrics()
+metrics.gauge("unciv_mailer_mail_queue_depth", lambda: mail_queue.qsize())
+metrics.gauge("unciv_mailer_spool_depth", lambda: len(spool_known))
+metrics.gauge("unciv_mailer_digest_recipients", lambda: len(digest_pending))
+metrics.gauge("unciv_mailer_tracked_games", lambda: len(file_states))
+
+
+class SMTPPool:
+    """Keeps up to `size` authenticated SMTP sessions alive and hands them out for reuse."""
+
+    def __init__(self, size, idle_timeout):
+        self.idle_timeout = idle_timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        with metrics.timed("smtp_connect"):
+            smtp = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT)
+        try:
+            with metrics.timed("smtp_login"):
+                smtp.login(SMTP_USER, SMTP_PASS)
+        except Exception:
+            smtp.close()
+            raise
+        logging.debug(f"Opened SMTP session to {SMTP_HOST}:{SMTP_PORT}")
+        return smtp
+
+    def _close(self, smtp):
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    smtp, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if time.monotonic() - last_used < self.idle_timeout:
+                    return smtp
+                self._close(smtp)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, smtp):
+        if smtp is not None:
+            self._idle.put((smtp, time.monotonic()))
+        self._slots.release()
+
+    def send(self, sender, recipients, data):
+        """Sends the rendered message, returns the refused recipients like SMTP.sendmail()."""
+        smtp_rate.acquire()
+        smtp = self._acquire()
+        try:
+            try:
+                with metrics.timed("smtp_send"):
+                    return smtp.sendmail(sender, recipients, data)
+            except smtplib.SMTPServerDisconnected:
+                logging.info("SMTP session was closed by the server, reconnecting...")
+                smtp.close()
+                smtp = None
+                smtp = self._connect()
+                with metrics.timed("smtp_send"):
+                    return smtp.sendmail(sender, recipients, data)
+        except Exception as e:
+            if smtp is not None and not isinstance(e, SMTP_SESSION_ERRORS):
+                smtp.close()
+                smtp = None
+            raise
+        finally:
+            self._release(smtp)
+
+    def recycle_idle(self):
+        fresh = []
+        while True:
+            try:
+                smtp, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - last_used < self.idle_timeout:
+                fresh.append((smtp, last_used))
+            else:
+                logging.debug("Closing idle SMTP session")
+                self._close(smtp)
+        for entry in reversed(fresh):
+            self._idle.put(entry)
+
+    def close_all(self):
+        while True:
+            try:
+                smtp, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(smtp)
+
+
+class TokenBucket:
+    """Allows bursts of up to `burst` calls to acquire() and `rate` calls per second sustained, rate <= 0 disables it."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        # A bucket holding less than one token would never let a call through
+        self.burst = max(burst, 1)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+smtp_rate = TokenBucket(SMTP_RATE, SMTP_BURST)
+smtp_pool = SMTPPool(SMTP_POOL_SIZE, SMTP_IDLE_TIMEOUT)
+# (spool path, attempt) of mails ready for delivery
+mail_queue = queue.Queue(MAIL_QUEUE_SIZE)
+# heap of (monotonic due time, spool path, attempt) and every path in it or in flight
+spool_schedule = []
+spool_known = set()
+spool_ready = threading.Condition()
+# spool path -> monotonic time of the event that triggered the mail
+spool_received = {}
+# recipient -> {"due": monotonic flush time, "games": {gameId: template values}}
+digest_pending = {}
+digest_ready = threading.Condition()
+# Set by the signal handlers, watch() and the catch-up stop between two files once it is set
+stop_requested = threading.Event()
 
 def load_mail_map(mmap):
     global mail_map_mtime
@@ -45,110 +369,492 @@ def load_mail_map(mmap):
         return mmap
     return {}
 
+class StateLog:
+    """
+    Append-only journal backing file_states, one [file_base, state] JSON line per update.
+    Appends reach the OS immediately and are fsynced in batches by sync(); compact()
+    rewrites the journal with a single line per entry.
+    A legacy file_states.json holding the whole dict is read as a single record.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = 0
+        self._f = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        states = {}
+        if not os.path.exists(self.path):
+            return states
+        with open(self.path, "rb") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line.decode("utf-8"))
+                except ValueError as e:
+                    # Usually a torn last line from a crash mid-append
+                    logging.warning(f"Skipping corrupt state record on line {number}: {e}")
+                    continue
+                if isinstance(record, dict):
+                    states.update(record)
+                    self.records += 1
+                    continue
+                if not (isinstance(record, list) and len(record) == 2 and isinstance(record[0], str)
+                        and (record[1] is None or isinstance(record[1], dict))):
+                    logging.warning(f"Skipping malformed state record on line {number}: {line[:80]!r}")
+                    continue
+                if record[1] is None:
+                    states.pop(record[0], None)
+                else:
+                    states[record[0]] = record[1]
+                self.records += 1
+        return states
+
+    def append(self, file_base, state):
+        line = json.dumps([file_base, state]) + "\n"
+        with self._lock:
+            self._f.write(line)
+            self._f.flush()
+            self.records += 1
+            self._dirty = True
+
+    def sync(self):
+        with self._lock:
+            if self._dirty:
+                os.fsync(self._f.fileno())
+                self._dirty = False
+
+    def compact(self, states):
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                for file_base, state in states.items():
+                    f.write(json.dumps([file_base, state]) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            dir_fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+            if self._f is not None:
+                self._f.close()
+            self._f = open(self.path, "a")
+            self.records = len(states)
+            self._dirty = False
+
+    def needs_compaction(self, live):
+        return self.records > max(2 * live, STATE_COMPACT_MIN)
+
+
+state_log = StateLog(FILE_STATE_PATH)
+
+def set_file_state(file_base, state):
+    with state_lock:
+        file_states[file_base] = state
+        state_log.append(file_base, state)
+
 def load_data():
     global file_states
     logging.info(f"Loading file_states from {FILE_STATE_PATH}")
-    if not os.path.exists(FILE_STATE_PATH):
-        logging.info("file_states doesn't exist, skipping")
-        return
+    try:
+        file_states_tmp = state_log.load()
+    except Exception as e:
+        logging.warning(f"Failed to load file_states with {e}\n{traceback.format_exc()}")
+        file_states_tmp = {}
+        # Keep the unreadable journal for inspection instead of compacting over it
+        if os.path.exists(FILE_STATE_PATH):
+            corrupt_path = f"{FILE_STATE_PATH}.corrupt"
+            os.replace(FILE_STATE_PATH, corrupt_path)
+            logging.warning(f"Moved unreadable file_states to {corrupt_path}")
     logging.info(f"Caching files in {WATCH_DIR}")
-    files = [ e.name for e in os.scandir(WATCH_DIR) if e.is_file() and not e.name.endswith("_Preview")]
+    files = { e.name for e in os.scandir(WATCH_DIR) if e.is_file() and not e.name.endswith("_Preview")}
     logging.debug(f"Files iterated: {files}")
-    with open(FILE_STATE_PATH, "rb") as f:
-        try:
-            file_states_tmp = json.load(f)
-        except Exception as e:
-            logging.warning(f"Failed to load file_states with {e}\n{traceback.format_exec()}")
-            file_states = {}
-            return
-    file_states = {e: file_states_tmp[e] for e in file_states_tmp if e in files }
-    logging.info(f"File states loaded successfully: {file_states}")
+    with state_lock:
+        file_states = {e: file_states_tmp[e] for e in file_states_tmp if e in files }
+        state_log.compact(file_states)
+    logging.info(f"File states loaded successfully: {len(file_states)} games tracked")
 
 def save_data():
-    global file_states
     logging.info(f"Saving file_states to {FILE_STATE_PATH}")
     try:
-        with open(FILE_STATE_PATH, "w") as f:
-            json.dump(file_states, f)
+        with state_lock:
+            state_log.compact(file_states)
         logging.info("File states saved successfully")
     except Exception as e:
-        logging.info(f"Failed to save states: {e}\n{traceback.format_exec()}")
+        logging.info(f"Failed to save states: {e}\n{traceback.format_exc()}")
+
+def state_sync_worker():
+    while True:
+        time.sleep(STATE_SYNC_INTERVAL)
+        try:
+            state_log.sync()
+            if state_log.needs_compaction(len(file_states)):
+                logging.info(f"Compacting {state_log.records} state records into {len(file_states)}")
+                with state_lock:
+                    state_log.compact(file_states)
+        except Exception as e:
+            logging.error(f"Syncing file_states failed with: {e}\n{traceback.format_exc()}")
 
 def send_missed_mails(mail_map):
-    for entry in os.scandir(WATCH_DIR):
-        if not entry.is_file():
-            continue
+    """
+    Catch-up scan run next to the live watcher on startup: _Preview files are
+    decoded oldest first, by a pool of SCAN_WORKERS processes once there are at
+    least SCAN_POOL_MIN_BYTES of them. The state checks and mail delivery stay in this process.
+    """
+    entries = scan_previews(WATCH_DIR)
+    jobs = []
+    for filepath in entries:
+        try:
+            fingerprint = file_fingerprint(filepath)
+            if not fingerprint_unchanged(filepath, fingerprint):
+                jobs.append((filepath, fingerprint))
+        except OSError as e:
+            logging.warning(f"send_missed_mails: Skipping file {filepath}: {e}")
+    jobs.sort(key=lambda job: job[1][2])
+    if not jobs:
+        logging.info(f"Catching up on 0 of {len(entries)} previews")
+        return
+    if SCAN_WORKERS <= 1 or sum(fingerprint[1] for _, fingerprint in jobs) < SCAN_POOL_MIN_BYTES:
+        logging.info(f"Catching up on {len(jobs)} of {len(entries)} previews")
+        catch_up(jobs, [ functools.partial(decode_preview, filepath) for filepath, _ in jobs ], mail_map)
+    else:
+        logging.info(f"Catching up on {len(jobs)} of {len(entries)} previews with {SCAN_WORKERS} workers")
+        # forkserver, as forking next to the running delivery threads is unsafe
+        with ProcessPoolExecutor(min(SCAN_WORKERS, len(jobs)), mp_context=multiprocessing.get_context("forkserver")) as pool:
+            catch_up(jobs, [ pool.submit(decode_preview, filepath).result for filepath, _ in jobs ], mail_map, pooled=True)
+            pool.shutdown(cancel_futures=True)
+    logging.info("Catch-up finished")
+
+def catch_up(jobs, decoders, mail_map, pooled=False):
+    for (filepath, fingerprint), decode in zip(jobs, decoders):
+        if stop_requested.is_set():
+            logging.info("Stopping catch-up, the remaining previews are picked up on the next start")
+            return
         try:
-            process_file(entry.path, mail_map)
+            parsed = decode()
+            if file_fingerprint(filepath)[:3] != fingerprint[:3]:
+                logging.info(f"File changed during catch-up, leaving it to the watcher: {filepath}")
+                continue
+            handle_preview(filepath, parsed, fingerprint, mail_map)
         except Exception as e:
-            logging.error(f"send_missed_mails: Processing file {entry.path} failed with: {e}\n{traceback.format_exc()}");
+            if not isinstance(e, DecodeError):
+                metrics.inc("unciv_mailer_process_errors_total")
+            elif pooled:
+                # Counted in the worker process, whose metrics never reach this one
+                metrics.inc("unciv_mailer_decode_errors_total")
+            logging.error(f"send_missed_mails: Processing file {filepath} failed with: {e}\n{traceback.format_exc()}");
+
+def file_fingerprint(filepath):
+    """Returns [inode, size, mtime_ns, content hash], the hash is filled in lazily by fingerprint_unchanged()."""
+    st = os.stat(filepath)
+    return [st.st_ino, st.st_size, st.st_mtime_ns, None]
+
+def content_hash(filepath):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        while chunk := f.read(DECODE_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def fingerprint_unchanged(filepath, fingerprint):
+    file_base = os.path.basename(filepath).replace("_Preview","")
+    with state_lock:
+        known = file_states.get(file_base, {}).get("fingerprints", {}).get(os.path.basename(filepath))
+        if known is not None and known[:3] == fingerprint[:3]:
+            return True
+    if not FINGERPRINT_HASH:
+        return False
+    # Hash before decoding, so a stored hash never belongs to newer content than the stored state
+    fingerprint[3] = content_hash(filepath)
+    if known is not None and known[3] == fingerprint[3]:
+        with state_lock:
+            known[:3] = fingerprint[:3]
+            set_file_state(file_base, file_states[file_base])
+        return True
+    return False
 
-def file_changed(filepath, parsed):
+def file_changed(filepath, parsed, fingerprint=None):
     global file_states
     if not os.path.isfile(filepath):
         return False
     file_base = os.path.basename(filepath).replace("_Preview","")
-    old_state = file_states.get(file_base)
     file_state = {"nation": parsed.get("currentPlayer"), "turn": parsed.get("turns")}
+    with state_lock:
+        old_state = file_states.get(file_base)
+        fingerprints = dict(old_state.get("fingerprints", {})) if old_state else {}
+        if fingerprint is not None:
+            fingerprints[os.path.basename(filepath)] = fingerprint
+        set_file_state(file_base, {**file_state, "fingerprints": fingerprints})
     logging.debug(f"Compared file states: {old_state} - {file_state}")
-    if old_state == file_state:
+    if old_state and all(old_state.get(key) == value for key, value in file_state.items()):
         logging.info(f"File unchanged, skipping...")
         return False
     logging.info(f"File changed, processing...")
-    file_states[file_base] = file_state
     return True
 
-def process_file(filepath, mail_map):
-    
+def read_save_text(filepath, timings=None):
+    """
+    Yields the decoded JSON text of a base64+gzip save in bounded chunks.
+    Seconds spent reading and decoding are added to the "read" and "decode" keys of `timings`.
+    """
+    timings = {"read": 0.0, "decode": 0.0} if timings is None else timings
+    text = codecs.getincrementaldecoder("utf-8")()
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    rest = b""
     with open(filepath, "rb") as f:
-        decoded = gzip.decompress(base64.b64decode(f.read()))
-        parsed = json.loads(decoded)
-        
-        if not file_changed(filepath, parsed):
+        while not inflater.eof:
+            start = time.perf_counter()
+            raw = f.read(DECODE_CHUNK_SIZE)
+            read = time.perf_counter()
+            timings["read"] += read - start
+            data = rest + b"".join(raw.split())
+            cut = len(data) - len(data) % 4 if raw else len(data)
+            data, rest = data[:cut], data[cut:]
+            pending = base64.b64decode(data)
+            while pending and not inflater.eof:
+                chunk = inflater.decompress(pending, DECODE_CHUNK_SIZE)
+                pending = inflater.unconsumed_tail
+                chunk = text.decode(chunk)
+                timings["decode"] += time.perf_counter() - read
+                yield chunk
+                read = time.perf_counter()
+            timings["decode"] += time.perf_counter() - read
+            if not raw:
+                break
+    yield text.decode(inflater.flush(), final=True)
+
+
+class PreviewScanner:
+    """
+    Incremental JSON scanner over the chunks of read_save_text().
+    Only the top-level PREVIEW_FIELDS and civName/playerId of each civilization
+    are materialized, everything else is skipped without being parsed.
+    Scanning stops as soon as the civilization of the current player is known.
+    """
+
+    STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+    SCALAR = re.compile(r'(?:-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null)(?=[\s,\]}])')
+    SKIP = re.compile(r'(?:[^"{}\[\]]++|"(?:[^"\\]++|\\.)*+")*+', re.S)
+    WHITESPACE = re.compile(r'\s*')
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        while True:
+            self._pos = self.WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self._pos} of the save")
+        self._pos += 1
+
+    def _match(self, regex):
+        # Tokens are only matched once complete, so a partial one just pulls in the next chunk
+        while not (m := regex.match(self._buf, self._pos)):
+            if not self._fill():
+                raise ValueError(f"Malformed token at offset {self._pos} of the save")
+        self._pos = m.end()
+        return m.group()
+
+    def _value(self):
+        if self._peek() == '"':
+            return json.loads(self._match(self.STRING))
+        if self._peek() in "{[":
+            self._skip()
+            return None
+        return json.loads(self._match(self.SCALAR))
+
+    def _skip(self):
+        if self._peek() not in "{[":
+            self._value()
             return
+        depth = 0
+        while True:
+            self._pos = self.SKIP.match(self._buf, self._pos).end()
+            if self._pos == len(self._buf):
+                if not self._fill():
+                    raise ValueError("Unexpected end of the save")
+                continue
+            char = self._buf[self._pos]
+            if char == '"':
+                self._match(self.STRING)
+                continue
+            self._pos += 1
+            depth += 1 if char in "{[" else -1
+            if depth == 0:
+                return
 
-        currentPlayer = parsed.get("currentPlayer")
-        civs = [ i for i in parsed.get("civilizations") if i["civName"] == currentPlayer ]
-        logging.debug(f"CurrentPlayer: {currentPlayer} Civs: {civs}")
-        logging.debug(f"File data: {parsed}")
-        player_id = civs[0].get("playerId");
-        turn = parsed.get("turns")
-        recipient = mail_map.get(player_id)
-        
-        # TODO if data incomplete, try game file instead
+    def _members(self):
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            yield key
+            if self._peek() == "}":
+                self._pos += 1
+                return
+            self._expect(",")
 
-        if recipient:
-            logging.info(f"Sending mail to {player_id}")
-            send_mail(filepath, parsed, recipient)
-        else:
-            logging.info(f"No email mapping found for Player-ID: {player_id}")
+    def _elements(self):
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield
+            if self._peek() == "]":
+                self._pos += 1
+                return
+            self._expect(",")
 
+    def _complete(self, parsed):
+        if any(field not in parsed for field in PREVIEW_FIELDS):
+            return False
+        return any(civ.get("civName") == parsed["currentPlayer"] for civ in parsed.get("civilizations", []))
 
-def send_mail(filepath, parsed, recipient):
+    def scan(self):
+        parsed = {}
+        for key in self._members():
+            if key in PREVIEW_FIELDS:
+                parsed[key] = self._value()
+            elif key == "civilizations" and self._peek() == "[":
+                civs = parsed["civilizations"] = []
+                for _ in self._elements():
+                    civ = {}
+                    for civ_key in self._members():
+                        if civ_key in ("civName", "playerId"):
+                            civ[civ_key] = self._value()
+                        else:
+                            self._skip()
+                    civs.append(civ)
+                    if self._complete(parsed):
+                        return parsed
+            else:
+                self._skip()
+            if self._complete(parsed):
+                break
+        return parsed
 
-    gameId = parsed.get("gameId", os.path.basename(filepath).replace("_Preview",""))
-    nation = parsed.get("currentPlayer", "Unknown")
-    turn = parsed.get("turns", "First Turn")
-    since = datetime.utcfromtimestamp(parsed.get("currentTurnStartTime", int(datetime.now(timezone.utc).timestamp()*1000))/1000).strftime('%d.%m.%Y %H:%M:%S')
+
+def decode_save(filepath, timings):
+    """Decodes a small save as a whole and keeps the same fields PreviewScanner does."""
+    start = time.perf_counter()
+    with open(filepath, "rb") as f:
+        data = f.read()
+    read = time.perf_counter()
+    text = zlib.decompress(base64.b64decode(data), 16 + zlib.MAX_WBITS)
+    timings["read"] += read - start
+    timings["decode"] += time.perf_counter() - read
+    save = json.loads(text)
+    parsed = { key: save[key] for key in PREVIEW_FIELDS if key in save }
+    if isinstance(save.get("civilizations"), list):
+        parsed["civilizations"] = [ { key: civ[key] for key in ("civName", "playerId") if key in civ } for civ in save["civilizations"] ]
+    return parsed
+
+class DecodeError(ValueError):
+    """The file is not a valid base64+gzip JSON save."""
+
+def decode_preview(filepath):
+    timings = {"read": 0.0, "decode": 0.0}
+    start = time.perf_counter()
+    try:
+        if os.path.getsize(filepath) <= DECODE_BUFFER_LIMIT:
+            parsed = decode_save(filepath, timings)
+        else:
+            parsed = PreviewScanner(read_save_text(filepath, timings)).scan()
+    except (ValueError, zlib.error, EOFError) as e:
+        # OSErrors like a vanished file pass through, they are no decode failure
+        metrics.inc("unciv_mailer_decode_errors_total")
+        raise DecodeError(f"{os.path.basename(filepath)} is not a valid save: {e}") from e
+    # Scanning is interleaved with reading and decoding, whatever is left is parsing
+    parse = time.perf_counter() - start - timings["read"] - timings["decode"]
+    metrics.observe("unciv_mailer_stage_seconds", timings["read"], stage="read")
+    metrics.observe("unciv_mailer_stage_seconds", timings["decode"], stage="decode")
+    metrics.observe("unciv_mailer_stage_seconds", parse, stage="parse")
+    return parsed
+
+def process_file(filepath, mail_map, received=None):
     
-    msg = MIMEMultipart('alternative')
-    msg["Subject"] = "Unciv - It's your turn!"
-    msg["From"] = SMTP_USER_FROM
-    msg["To"] = recipient
+    with metrics.timed("fingerprint"):
+        fingerprint = file_fingerprint(filepath)
+        unchanged = fingerprint_unchanged(filepath, fingerprint)
+    if unchanged:
+        logging.info(f"File fingerprint unchanged, skipping...")
+        metrics.inc("unciv_mailer_files_skipped_total")
+        return
+
+    parsed = decode_preview(filepath)
+    handle_preview(filepath, parsed, fingerprint, mail_map, received)
+
+def handle_preview(filepath, parsed, fingerprint, mail_map, received=None):
+
+    with metrics.timed("file_changed"):
+        changed = file_changed(filepath, parsed, fingerprint)
+    if not changed:
+        return
+
+    currentPlayer = parsed.get("currentPlayer")
+    civs = [ i for i in parsed.get("civilizations") if i["civName"] == currentPlayer ]
+    logging.debug(f"CurrentPlayer: {currentPlayer} Civs: {civs}")
+    logging.debug(f"File data: {parsed}")
+    player_id = civs[0].get("playerId");
+    turn = parsed.get("turns")
+    with metrics.timed("mail_map"):
+        recipient = mail_map.get(player_id)
+
+    # TODO if data incomplete, try game file instead
 
-    plain = f"""It's your turn!
+    if recipient:
+        logging.info(f"Sending mail to {player_id}")
+        send_mail(filepath, parsed, recipient, received)
+    else:
+        logging.info(f"No email mapping found for Player-ID: {player_id}")
 
-Your Nation: {nation}
-Current Turn: {turn}
-Since: {since}
-Game ID: {gameId}
 
-Launch Game: https://unciv.app/multiplayer?id={gameId}
+TEMPLATE_FIELDS = ("nation", "turn", "since", "gameId")
+DIGEST_FIELDS = ("count", "games")
+
+DEFAULT_PLAIN_TEMPLATE = """It's your turn!
+
+Your Nation: $nation
+Current Turn: $turn
+Since: $since
+Game ID: $gameId
+
+Launch Game: https://unciv.app/multiplayer?id=$gameId
 
 Unciv on GitHub: https://github.com/yairm210/Unciv
 My GitHub: https://github.com/cy-elec
     """
-    html = f"""<html>
+DEFAULT_HTML_TEMPLATE = """<html>
 	<head></head>
 	<body>
 		<div stgle="text-align: center; font-size: 1.2em; font-weight: bold; color: #006398; margin-top: 20px; font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">
@@ -166,20 +872,20 @@ My GitHub: https://github.com/cy-elec
 				overflow: hidden;">
 			<tr>
 				<td style="padding: 14px 18px;font-weight: bold; font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">Your Nation</td>
-				<td style="padding: 14px 18px; font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">{nation}</td>
+				<td style="padding: 14px 18px; font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">$nation</td>
 			</tr>
 			<tr style="background-color: #f6fafd;">
 				<td style="padding: 14px 18px;font-weight: bold; font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">Current Turn</td>
-				<td style="padding: 14px 18px; font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">{turn}</td>
+				<td style="padding: 14px 18px; font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">$turn</td>
 			</tr>
 			<tr style="border-bottom: 2px solid #006398;">
 				<td style="padding: 14px 18px;font-weight: bold; font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">Since</td>
-				<td style="padding: 14px 18px; font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">{since}</td>
+				<td style="padding: 14px 18px; font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">$since</td>
 			</tr>
 			<tr style="background-color: #f6fafd;">
 				<td style="padding: 14px 18px; font-weight: bold; font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">Game ID</td>
 				<td style="padding: 14px 18px; font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">
-					<span style="font-family: monospace; word-break: break-all;">{gameId}</span>
+					<span style="font-family: monospace; word-break: break-all;">$gameId</span>
 				</td>
 			</tr>
 		</table>
@@ -190,7 +896,7 @@ My GitHub: https://github.com/cy-elec
                     style="height: 34px; width: 34px; vertical-align: middle; border: none;">
             </a>
             <div style="text-align: center;">
-                <a href="https://unciv.app/multiplayer?id={gameId}" style="display: inline-block; background-color: #006398; color: #fff; padding: 12px 30px; text-decoration: none; font-size: 1em; font-family: 'Segoe UI', Arial, Helvetica, sans-serif; border-radius: 6px;"> Launch Game </a>
+                <a href="https://unciv.app/multiplayer?id=$gameId" style="display: inline-block; background-color: #006398; color: #fff; padding: 12px 30px; text-decoration: none; font-size: 1em; font-family: 'Segoe UI', Arial, Helvetica, sans-serif; border-radius: 6px;"> Launch Game </a>
             </div>
             <a href="https://github.com/cy-elec" style="position: absolute; right: 0; top: 50%; transform: translateY(-50%); text-decoration: none;">
 				<img src="cid:githublogo"
@@ -202,30 +908,299 @@ My GitHub: https://github.com/cy-elec
 </html>
     """
 
-    unciv_img = """iVBORw0KGgoAAAANSUhEUgAAAEcAAABHCAYAAABVsFofAAAACXBIWXMAAAGJAAABiQGeLhE1AAAAGXRFWHRTb2Z0d2FyZQB3d3cuaW5rc2NhcGUub3Jnm+48GgAAFClJREFUeJztnHl0VdW9xz/73CkjGchESBhCLgkyBEgIg6LGAfTRQq1TAWvV2r461AHRonZ8T4vPAWufr7U4UIeignXAARDx4cAcgmFMSIIJCZCQQKY733vOfn/ckJube3NzWK9J31uL71p3rZzfPr99fvt79m/v3/7tfSKklJxHeCj/bAP+L+M8ORFwnpwIMA72A3NzC9KEYtoATDgHtQNS815VXV1+aqDsCodBJ0co5idS0sdOmVFyj26dHf/9xyktTUeeAG4bOMtCIQZzthqTP7VI0Qw75i96wZA5olC33olje1i3+meqpqgzairKSgfQxCAM2pgjhFCEpqzIyb8sIjFChMoyRxSSk3+ZQWjKs0KIQbN50B5ktRbdaDJaZs8suTekzOUGuwME8MpaydFjob15Zsm9mIyWi6zWohsHwVxgkMgpKCiIlUIun1S8mPiEzJDy0n2SjV9KNm+TXDELsjNDu098QiaTihcjkU8UFBTEDobdg0KOw2FcGhuXNnLKjFtCyhoaYcxIWHCloL0T0lMEDSclre2h9UyZcQux8WkjHA7j0oG3ehDIGTOmaARCPDj9krswmWNCyjs6JW+uA58K18wVnDot2fAl2B2hrmUyxzD9krtBiAfHjCkaMdC2Dzg5ioHl6ZkTY63jrw5bfoFVkJwo8Hr9ZDjdMDpLkDUszMgMWMdfRXrmxFjFwPIBM7oL5xznTJgwK9njcS+QUkT1e7Mik4RQFs66/H76mmRcbmjtkERZ/GQkJQi+bZBIKcLOXEIozLp8Ce+/cdtCa17hQTTR2r/VssPlsrxbX7/N2f+9AZwTOULcYMgd6/4w0eibFWNQdelk5M4hffikPsvXfeYfhI1GcLshOQFysuHr3ZLZxeF7T/rwiRTNnCdaT21+XI8Np097aW31/A24SZfRXTinIDA3b9rNUUJ99bHRB0k2eXTpeKJHsP/yQ2jG0AmmokZSug/SUqDuBDQ2C8xmyRUzYVsZLPwupCSHI0hy/dXPMWJYpS4bvim3ceONhzUkl1RWln6tS4lzGHPy8y+KF1L+/urkRt3EAJidxxhW/VSI3OmCDV/ApHzYtE1QWStot0Nzq+C9TYKSGfD3DRDu3VlHfaObGIDJBXHMnz9U0TTxrBA3GPTq6SZHVd3Lhpo8w+ckN4Ut92jg1cLrZlQ9jdlRFyT7cLPkwiL4+Avo3X6XF7bvhZHD4evS4FKjwcvFRe/pNbsbDyzJIjZOKbJaa27Wq6OLnLy84hyEXHJd6nEsSigDNi88tx9eqgAtzJtWVDvZhx7uvq6pk3g8cLwRTreHH1cq6wTxsfDNIWjvDMinjv+cxCHNeswOQkaGmZ/+NAMQj1utM4bo0dE1IGtSfdIaY4+aNuRMt6yyDVwqpEbDtkZQJbR74LPjUDAUajshOw4yu0Kb5ONvc2r0HXQOnc2xEzB+LBxvgkum9WBT4l9DdMHtgbwcwckmSUK8IC6mjekFG8IbKQkoi/Dj6G23ZrB2bcuwhuPuR4Bl/bW73wE5N7eoxKDIzY+OqhCjohwA2H3w/AG/Pb3a022nAGJN8PPxAbk9sYjDl+yg8bTCm+vAYukygoBriR76ElBV+PENgugouGr2a4y3bg9rZ8PWtfhc/i4Wm5ZD6sRLw963fv0Z7rm3xi01OaG6ek91pLZH7DklJSVGobDiwoTT3cQAxBr9PeaUM5SYsw0EGB0XLI9tK2XosdeQI2/l3ltDx5pwULoqy0it5YLcHWHv0XxePPZWkH6Xd3e0EEx5AFddlcz04lOWnTs7nwKuifjsSIX1Jzpui1bUydekngiSqxI6vYHrtGj4lxFw5XCIMwXkrZ5Q8rIOP4rB14EQ/ob39wMQQlJS/A6iD3dR3U4MJgsGczQGczRS89KXRwgBjzwyAoOBBXl5Uy+P1P4+yRkzpihBSPFv84Y2kmAMMFFvg7eqwenzX1sMsCgXJiVDYSpcnxMg5Lgd3v0WzrgD9ZpcJxl25Nwi/7zRpWSm14QWSKjb8gYN29ciVZW4zHGY41JQ3U5qN79MY9nGsPVdcEEM116XKjSpPCNKSvr0nr4LjMo0BTX94sSWIHn5aai3B67ToiCqR+SQFu0nzNUVQFe2w7AYmJEeuCez4UWGXfc7pMHc1+ODMPWCTWHlqteF6rYBfgfydLbg7mhCU/1xmMd2hr7c66bFaaxZ01wwqrEtC6gNV3+f5Ahh3unTXMc/b00d/t2Uk93yKSl+l6rz28Qpl78XRXfV1OQIECOA/ETISwyuO3v+3YyaoY8YP2YDq3tbiNfWTmCGoosYX7dMddmQqg9hCI37XlnViETurq2w1vf11IizVW5e0Y+ihPbXx3IOkmwMRMWqhP86CI4u10qJgqJU8Kiw85R/NgPIioWbrMF1WlKyKfrTYQxR55Kv0oDlQAMAUpOc2Pk+UvOiqV6GZE3A2VKHz2VDIolJGYmmenG3nkAYzJjjU0ibVNJdW3m5jetvOKwJIi8nIg7INUdy3nBryq6/nxoeJDeI4IG3xQUb6uHzEwFiABLCdI7RP1qumxiHw4Hb7e4y87puuc/ZgbujCY/tDD5nJ+72ZlxtTXidHV3Xp3C3NeF1duKxncbRUtftWVLC47+vR2pibX/rrIjkSLlGlZpy/86OJFntDMzLdh8061j8n3W9sxiSP4u0ixcB4HQGV7Bs2TJmzpzJzJkzKS8vB2Dr1q3U1Z1dduQBUwDw2oPThM4zDUgZyBJ47W34nIGwWvO4UT0uANatO83evTaHpsmH+rO/3wi5unrXNuvYotVvNWUtfmRUJQqSWCN8f3RXhBwF25rgSJe9hakw+WyE3KODCMXAmNuf7d5eWLVqFXfeeWd3eUtLCykpKaSlpdHZ6W9YqMtfAxwgOmU4Iy75YQ95+EG3JwyWKOx2laefaQAhnqqp2X2sv7brWj5ITXn4W1fs97a3J8demHAaAGtCoHxuFnzb6Xe1yzP98Ulqr1RYWskPiR9bDEB7ezuHDx+mrq6OkSNHAuDz+Thz5kw3Ia+//jqffPIJFouFhQsXMnfuXCAVuByhbMB4TmOWHy++2Ehjo+dYTLQ3NE0QBroWntXVu+qRPPle83BcWujIH2uCeybAj/MCgVtPGKKHMOqmx7qv9+7dy/PPP8/KlSu7ZTk5OSQmJmLpWlNUVVXhcDiw2WzU1/ecUOYCvaY/HWhocPPKqkYEPFxeXm7vX+McUhaOBJ5uVU11n5zOCFtuUsDYR23Z1y3DMjQwqL/88ssArF69GpfLxfr160lKSmLOnDlERUXhdDo5efIkqamppKenU1VVhcvl6tKOAhboNbsbTz3dgNOhba2q2vOWXh3d5BwvLXVI5C8+PZNGs9ei26iojByyFtwXJLPb7cybN4/Zs2fT1NTEypUrWbp0KQsWLGDHjh3U1NSgaRonT56kurqaiooKamtre9QwHRil24bduztZv75VVRSxRErZR9YpFOeWYFcN9V6DJp975DoRM67//DrAlVEXUWyODq5GVfH5fHi9XjZs2MCQIUO49tpreemllzCb/fO/3W7H5XLh8/nC1CrY8ta9VO7Wly8/UPcFUj7mUVUadSl0QTc5Qggl11r4jGVeqvDOTiXMnltYvM8BFnCCXAI7nW63G7vdjtHof3xHRwc+nw9N01AUf2dua2vDZrN1k9gTzfVQ9lkUmqrvBY2Im096/AfRjZ37nwAW6TRdv1vl5k5dJKINM2KXju73XldLB5rPH3f4UPkjHyB7TLU+nw+Px9Md6zidTpxOJ1LKbnLOQvTan5EStrwNmr7Nj646FGaOvh8FcWPuuOJZevV0kTNhwoQ4hFgefftwlMzQ8Ub6Am7cXHqE/X95H80dcIfdHOErDvQyWHQToShK99/JyckAmEwmDAYDBoOhu4cB1OyFuoN6mxdAevwkclOvUoSq6T6poesmj8eyTMm0ZEXfnhW23NvpxGd3U/fRdo5+9DVpk8dijA0m8T9Zhxu/e8THx5OcnExaWlr3dVxcHIqiYDL51yVpaWkkJSWRmJjYTZjPC1vW9G3n17vXs6Ms/AoeoHjk3ZgMMcVW61RdSfZ+ycnPnz5aIpbELh2NiA6/q2FOisXncDNi7nSm3HcjI+fNCLmngRbW8CUAcXFx+Hw+mpubSU9Pp6KigpqaGhISEsjOziYhIYEtW7ZQUVFBdXU1+/fvx2w2U7YJ2sJvfgDgdNkpP7iDltaTYcvjLOkUDL8ZqTPJ3m8O2ZpXtMY0dcj1CasLgtN6Ek7vP8qZg98ipfS7idmE6vYgDAqpk3JJHBe81x9LFG/zMEPRlfwPgr0dXn4YPBEmqE1fvUNVzQGio2O4+rIbyUgdGXKPT3Oxpux6Ol0nl1dVlT4S6ZkRybFaiy/BoH2euHayYpwYH1R2/PO91H+5N2KDcuZdSNq0vCDZd5jOo/wgol44bHwF9n8V+Z5NX70D+HvQicY6Zk+/ivFdS5aeqGnZxGeVDzsVoUyorNx1tK/6+nSrkpISI0JbEXVNeggxqsvL8a3lkS0F6j8vRarB5H/CLiroM78UFk21cGCrvntTk4cx/8ofMX/uzZQf2knl0dAXOCblCoYNmRKtSfXJSHX1SU5Dg/1CTGJqzH2hXdPZdAZN7T/Q9DpceNqD8xYakud4D+neBzp+qqOCz1d3byzoRmbaKK6f9xOqag8SumIXTB/1c0B8Pze3OLuvOvoMAqXkqPBKp7esM9pytaV3mW6Ec9uhnRsRJ0LPBoaDIg1otm1AqHv0B5Mpion503C67ERHBe8TnWjfg4BGl9vY0od63z2nunpXPYLnHE99i3QFvzbzkNATWmErNxgwxQUvHSyaj7uadR90QAiVSy9fghDhu05bRwvbyz5lW+kGOm1tIeXZGblYep0oc3ia2dvwV6QUv4p0ZifyVK4Zl/saXCedqxqCxJbkIcSk9J82iB+ZgcFiCpItat3DMG9Hv7o9MTxrK/njQhfTNkcb73z0Inv3beObAztobGoIuUdRDCFR9666P+FV7WXVU0b/NdJzI5JTVbWjQ0E+6vxLA1pjj80nJMNnF0RSBSBr9uSg6zSvjR+eCZyx1jR4Z6Ng/p2CggUKMxcamPw9hdt/KdhzMHjZcPGlyzCZgtMwJxpr8XjcQbLey43eONV5kCOnPpaKkPfJNWsiLkL6DQKrqspelXat1P5MbZB86KQxpE7M7VNv+KxJxOcE537uaNlKtOaPkk+dhjk/FrywVuGumxW2rYVtb2t8+qpg1jSFRQ8JHnzSf5ASIH5IPdOmByfwMjNGYbYExkOj0UT28L5tkmhsr12BFNrayso9/QQGOk92jckrukgRfJn4ZoEwTukRwGmSE1+W07yvGmO0BalJNK+PjOILSJuWHxQ0TnSe5IVja1CQ2Bxw8WLBwmsUlt6sht1vt7sFix5UyE5Ref7XfpnXG8uqlw7S0R6YQds6mjlUVYamaYzLnczQpGF9tqO6eQObj/zSYTSo4w8f3lvbX7t1H3vLHVu02jQ5fmHiWwVhcqHhzkkEoCBZWfc2413+dMqDTwm80sAfHgqXqwnA5RXM/IHCkw+oXNm1lq44/AM++uBNXTb3hFd1smbv9XS6G/+9+kjpr/Xo6E5ZSJVlvm867e4Pwx0ckn387cfc9opuYmwOePMjwW/u8vtLebWBW39lwqf5Ca8+rrD4FyacHkGUSfL4ElixKvAy8vLXkJXdr0eEoPz4a9jcjfVRZlfEwK8ndJNTU1N6DCGetj9Ti3ToT6bEaB7uaAmEt6UHBLOKBEmxfhJL9wv+9p4Pm8tvyr5KhTfXeWlp8y9yr5ylcbBa4WzMKYTGpZctQQj9NtjcjZQffx2kfOTAgQO2/jX8OKc0aUyU5ylHk7yl42eHRhqy9WXh5k2oJ3VqwB6nSzJuTGB/e/F3fBROMJIY43ex+Zeq7HrXSHa6DySYFElWpggKPDOGlWJOu51Pt+bosuG0vQqfdG6rri7rveEeEedETnl5ud1qnXaNd3vbHd6dsn92pEj/YIOYc9cLRpKGBMYXW9c5qL9vNvPupxqF46G6zojZ5D/BXlUHv/6jkVXLIT3Jh63XRkprh5HXNu2lrXP/pwgZIYlxFqJTNcgnzyW57rdfygH7FRYWmnKthYd+e98IKSuQsgK5b52QMwsNUlYij25RpMUszp6eC/pNGmeQWiWyeZciR2cpUjtMdx2/vW+EzLUWHiosLDQNpP0D+u1DaWmpVwrxwFsbUzhS519GjM+VtLdr7D6kMDpD4w+/MaD0mv2GJius+g//uceVawXfLZHdR/2P1EXz1sYUpBAPlJaWens/8x+KgWS+K0wQVmvhx7fcYO1++x/8CTllgkG2lwkpK5C73jfIe241ysXfM8rf3meUx7cqUlYg96xT5IhMIU985dfTDiNvucEqrdbCj+kKQwbU9oF+gJSSsWML83Otha5NryZ2u8Yv70AWTzHIik2GbtnZn1aJ/PAlg8zOVOTGlwPyTa8mylxroWvs2ML8wbB70D6AteYVrhg1zHP/x88fxGzyP/ONdYJfPgfFkxUunS5ITYKjDbBus0T1aPz5d5Ip4/z6Hq9g3t3jqT1pfraqcs+SwbB50MgZOXJSktlirnjo1oa0n3w/MMG43P5vH6rqJFIDkwmmTxJMmySDAvEX303nyVVZpzxuT35d3T4dnxH97zGon06PHVv0s7gY9c+f/uUgKYn6x9KWNhNz/nU8NofhjiNHSl8YQBODMKj/rqGqKufFToehfMXroR/BRsKK1zPpdBjKq6pyXhwg08JiUHsO+Hc0FIP22dAEr+4A9HS7yaepyhVVVbu+GEjbemPQyQHIy5taoCLy9d5vQFZUVpb1v93xD8Y/hZz/Lzj/L2Ii4Dw5EXCenAg4T04EnCcnAv4HFd70tCj9PZYAAAAASUVORK5CYII="""
-    github_img = """iVBORw0KGgoAAAANSUhEUgAAAGIAAABgCAYAAADmbacFAAAACXBIWXMAAA7DAAAOwwHHb6hkAAAAGXRFWHRTb2Z0d2FyZQB3d3cuaW5rc2NhcGUub3Jnm+48GgAAD2NJREFUeJztnXt0FFW2xr9d3Z1AAiRiQgJJ6ISkkzDgCCFDAJEQeSjo+JjFGxEVx7mOiopyUQQBHzPXcTFzdYBZd9ABRAfEB6MyykIe4iAMTngIEZJ0J51+AQmvcCfk1d217x/BQJOk01V1utOB+1srayVVdb59qnaqTtU5++xDzIxw5UaTqUd0g5zJkpTF4GwQZYKRDCAaQHcAsZd+1wH4N8AXAKoBcJGAkzKhBIxSgIvJYyhxOo+f7cDT8QuFkyPis7O7R9RxHiR5rMQYy0AOABJngU+CaA/JvF024EuXxeIQp62NDndEWlpaohv66cyYQU0XXgqZccJRMH8gS/J7J8rLbSGz21pVOsIRJpMpstbD9xFLswAeD0Af8kr4IgP4BkTrGi9GfFRVVVQT6gqE1BGJiTdHGyLrHmHi5wAkh8ywMs4SYYUkN75ps9nOh8poSByRnp4e0+DVPQnwUwDigm5QDBcArGS39AeXq+RMsI0F1RFEREl902eB6A0AvYJmKLhcIKYlTrt5BTN7g2UkaI5I6pedRbK8EuAxQTEQeg6D8JjTav5nMMSFO4KoQJ9kdC4DMB+AQah4xyMz8YooPf2n2WxuECks1BHJyaZk6GkDwCOFiYYnh8jLUxwOi0WUoLB39iRj1ljoUXgdOAEABrOODialZUwTJSjEEcmpGS8SydsAJIjQ6yR0J6YNSWmm/yIizV//mh5NRERJxow3ADyrtSKdnPWJcTFzCgsL3WoFVDti4MCBERdq6tcyaLpa49cYW8hbP8XhcNSpKazKEQMHDoyormncDPBENUavYXaTt36CGmcobiOIiKovNqz+fye0Sj7rumwiKlDcd6bYEUnGjOVgPKC03HXEXUlG5xqlDbgiRySnmV4A8Iyial2f3J9kzHhVSYGA24iU1IwJDNqCUI4XdHKYaIbLWrohkGMDckRKSlYS6+TD6Dw9p+HCBR1LOTZbSXl7B7brCKICfZ++zh1EGKW0FvOffQZZWSacP1+N0lIz9ny7D8eLi5XKhBwiQv/sLNwyYjgyM0244YZYlJSY8cbyP6gR+1dsdMTIoqKiRr+HteeI5NSMlwFarNR+fFwcCvfvgU6n89nucLqwYeMmbNz0IaqqTiuVDSoJCb0wbcokTJ82BclJST77PB4vhgwdgbPnzqmR/r2zwuz3o9evI3obTT/REQ5DRS/q7Fkz8dorS9vc73a7seGDD/HWilU4dapSqbxQevdOxNwnfo3pUydDr2/7zXPBwsV4/68b1Zjwysx5J2yWA20d0GbDS0SkI6yEyq7sEcOH+d1vMBjwwP0zsOfr7XjxhQWIiuqqSF+v1yEmJgaxsU0/MTExiusYHR2FRQsXYM/X2zFr5nS/TgCAEcPzFNu4hE4iWklEbV/vtu6IlFTTTAbeU2t5/97dSOrTJ+DjnS4XFi5aip27vm6qGBEy0vuhf3Y2TKYMmDLS0bt3IhISeiE+Lg6RkZGt6tTV1eHEyVM4c+YMbHYHLGVlMJstOHasGK4TJ5qPG3PbaLz2ytIWjyB/2Gx23JKvfpyLmB912Cyr29jX0hHx2dndI+s9JQD1VmMwKqorSo8dUVMUW7d9BTDjZz/LxY09e6rSaItTpypx4OAh6PQ63DF+nOLyzIz0rIFobPTb7vrjLHkjMx2OohYNTav3YpcG7+Os0gkA0KuX+uFpNRcoUBITE3DnxDtUlycixMfF+dxZCrkR+oa5AJZevaPFMyslJaUrM55WawkAoqOitBQPa7p176apPDPmxmdnd796ewtHyLrIOdA4wOOVZS3FwxrWfm43RNTJj1290ccRubm5BgI9p9XSmdNBDwPqME6f0X5uRDwvJSXF5zXRxxGnTl+4B4BRq6EzZ8+iuvqCVpmw4/z5apw/Xy1CKoGlLpOu3ODjCALuF2EFACxlZaKkwgazuKCNFte62RHJyf1vZMIEUYa++cceUVJhwz/2fCtMiwljU1Kymj9imh3Bes80ABGiDJ08eUqUVNgguCtGYp23ORyn2REEzBRl4Sf9s7H0pUWi5MKGZUsW46aBAwQq0ozm35j5UrS2dBZNU6A0ERkZiS8++wRZWZlapcISm82O2yfejZqLF0XIMbulXi5XyRkJAOo90igIcAIAPPXkr69ZJwCA0dgX856ZK0qOJAPnA5ceTUQoEKGa1KcPfvXLOSKkwpqHZs+C0dhXkBoXAJfbiNtESD4y58E2e0WvJQwGAx595GFRcgUAQPHxA7pFRDVcgMaggMjISBwu3Ifu3Vt0o1yT1NbWYVBuHmprVQX2XQkbyNNTMkQ1ZEJAZEZB/qjrxglAU1f/bQWjRUiRB4YsCURZItRGj1YcW9Dpyb9V0AwEmU2SBBbiiNycwSJkOhVDhuQI0WHiTIlZ+x2h0+mQnt5PRJ06Ff3SUltEqahDMkkAp2iVSUxIgMFwrU2Xax+9Xo8EDaORl+G+Egg9tMr06KFZotPSI0bEuVM3CYxorTJdulz73w5t0bVLF80aBO4uAdrvCI/Ho7kynRUNER3NMNBNAqBtNBxNsUTXK3V19SJkukkQMCldUGU6JfX1Qs7dIAGo1apy9tw5dHTep46AmdUGJftAQK0QR9TX1+PM2bDN0hY0qqpOo6FBeyYIBl+USIAjAMDpdImQ6VQ4nE5BSlQrMSAkPqS4pFSETKeiRNA5E1AtEcMuQuzgwUMiZDoVhQfEnDODbZIssZCkgoUHDoqQ6VQIO2cmu7A7wmwpg6Ws3Tl71wyWsnJYKyrEiEmwScwk7OH+9y+2ipIKez77fIs4MSazZCBDoSi9jz7eDK83aGnvwgaPx4uPPt4sTM8teQqliopjJwEIefe0VlTgy63bREiFNZ99vgV2h6hXV9gry8srm8JpGMLuijf/uAoez7V7V7jdbry1YpUwPQYdAC4FDTDhG1HCx4uL8fZf1oiSCztW/unPQl9KiPgb4JIjZNCXwpQB/P6/3xL2sRNOHDlyVOjdAACQ5C+AK2aVpqSayhlIE6XfNyUZWz79BD173iBKskOprKzCnff8QnREeJmzwpwB+MYzfSHSgt3hxMwHHsK5cyFLrx00KiurMG3mA8IzJDCo+Zo3O0JmDiidjRKOFv2ASVNnoKKiQ1cE0MTx4mLcN3kazBbxM6AIl695syNO2Mv2gmEWbazUbMGEu+7F3z79XLR0UJFlGWvffQ8/v3cy7PagrPdR7Kww7/vxj8szhpgZxOuCYfHfNTV44ql5mDZzdqdIE7T/u0Lcde8kLHppmagRuBYQY63v31eMrDWllEY52hk+nXDHeIwfNwYEQqnFgm3btgf8SkdEGHPbaDz84GyMvGU4JCk8EqI1Njbiq+078c6adfjuX8I+q9qiQQ9D2qWPaQCt5OJINmasAdGD/lQOfrcXvXrFN//NzNi5azcWL1mm6Iuzd+9E3D5uLEYMH4ZheUND/obldLmwd99+fLt3H3bs3BWyKckMrHZVmB+9clsLR/RJzewvgYvgJ0J8SM5gvP3nVYiP880sV3PxIh57/Cns+nq34spJkoTsrEz89KaBSEtLRarRiLS0VPTPzoLWjM8ejwfHjhej3FqB8vJylJVZcfjIEdhsQjqeleIlr9zf4SjzaY9bzU6TkmrazMC9/tQSExOw/He/Rf6oW322u91uzJj1EPb9c7/mGj8372k8PfdxzTrMjPkLFmLjpo80a2mG8KHTap7SYnNrjjAaTQO8TZnL/GaS0ul0WLJoIR5+yDcNbHX1Bdx5zy80/ccVjM7H+rVvqy5/NR6PF/dNmopDh78XpqkCN0u6m1zlxSVX72j18WOzmX8A0GqCpyvxer14adkr+OuGD3y2x8bGYPnvfqu6IdbpdHh12UuqyraFXq/DwufnC9VUDPGq1pwA+GkHvAYsQdOCR+2yaMnL+OHYcZ9tw/KGYvYsdVO380fdKnCy4GWGD8tDzuBBwnUD5Bx5urzc1s42HXHSbD7NwMJALDQ2NmL+8y9CviqFzkuLXsCwvKEB1/RH7vn5nYrLBErB6PygafuDgAWtZS77Eb/PjhM2y58A2hGIoSNHjuKTzZ/6bDMYDFj3l9UYna9sWtegQTcrOl4J+aNCv+ALA1udNss7/o7x6whmZlnyzCHgfwMxuOp/VrcIvYyOjsK7a1bj1ZeXoE9v/9np9Ho9Jk64HWmpmjMVtUl6P2EdzIFSTR78ktuJSQ0oJXWy0TQLhHcDsbp+7dtt3v5utxvbvtqBwgMHUWq2QJa9MBgi0C8tFYNu/ilG549CbKzytKFKYGb0yxwAt1v14ifK7BFPd1kt7SaLVZCk3fRHBp5o77ghOYPxt48/0PwRFkxyh40MVdLfdjMg/0jA75cJcTHzmNsfUj1w8BDWrlsfqGyH0LWLsmS/KtnpsiUvCPTggB1RWFjojpA8UwG02zG/9JXfeLdu+ypQ6ZAjc9CTPxazW5rKvCvgqVSKvrisVuspHUvjAT7p7ziv16t79D8el9etf98TjvMmBGSq9Ied9Txe6UKzij99bbaScpLkOwD4HQOVZZZeXLxUf/d9k2tC0K2sCFkO2j/HaZZ049WsHK96+bOkVFMOAVsBxLd7MABTRjqPGzeGcnNykJpqREKv+KYuECKcP3cepyorYbGUwSvLmDUzuCuq5Y3I15LNuC1OSDLfbrdbitQU1rQgYNMKvd5tAIT1R+QNzcXHm4QPn/sg+q2JACu8PF7L2qWahsdc5cUlrOeRAFT9F7SG1xv8LMoi2y0CDujJM0LrArKaxyldFoujsTZyOAgfatUCEJIgZlFtBAPvy+7aUVarVXNKT8UL17VGVVVRDRFNTe6bcYAJr0FDfsBQ5BUX8NbkZvA8V4VlhYj6AAKXMmNmdtjMrxPRLQBUh2rIobgjtH1HFMnMw0U6AQjCmnIOa+l+A3kGM+F1AIqv6tVd6cFApQ0PE17vakCuv7WC1BKUWBar1VrvspqfJ0kaAWCvkrIheTQpbiJoB0neIS6r+Xmz2ax9YnUrBDWoyFFe8p3LZhnJxNMBBBR3GZJHU8DO5hJm3O2sKB3rKC9Xt1ZPgAQ9uouZ2WW1bIztFpnJwCMA/MbrS0IygvlHr2/XxvdMNMNlKxvgsplDEisasjC7oqKiRleF+R2XzdIfjMkAdgNo8ZAYEoLcgIMHtTpu7QXwJYEnumyWwS5r6QZmDtnUJ01f1loxGrP6yZI8mxkzDAaDccSwPMNbby4XvtrW1djtDjz59LP4/sjRRrfHY5YI75FX967dXiy83yNQ/g9BNuTnV5LYVAAAAABJRU5ErkJggg=="""
+DEFAULT_DIGEST_PLAIN_TEMPLATE = """It's your turn in $count games!
+$games
+Unciv on GitHub: https://github.com/yairm210/Unciv
+My GitHub: https://github.com/cy-elec
+    """
+DEFAULT_DIGEST_PLAIN_ROW_TEMPLATE = """
+Your Nation: $nation
+Current Turn: $turn
+Since: $since
+Game ID: $gameId
+Launch Game: https://unciv.app/multiplayer?id=$gameId
+"""
+DEFAULT_DIGEST_HTML_TEMPLATE = """<html>
+	<head></head>
+	<body>
+		<div style="text-align: center; font-size: 1.2em; font-weight: bold; color: #006398; margin-top: 20px; font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">
+			It's your turn in $count games!
+		</div>
+		<table style="border-collapse: collapse;
+				margin: auto;
+				margin-top: 25px;
+				margin-bottom: 25px;
+				font-size: 0.95em;
+				font-family: 'Segoe UI', Arial, Helvetica, sans-serif;
+				min-width: 50%;
+				box-shadow: 0 0 20px rgba(0, 0, 0, 0.15);
+				border-radius: 12px 12px 0 0;
+				overflow: hidden;">
+			<tr style="border-bottom: 2px solid #006398;">
+				<td style="padding: 14px 18px; font-weight: bold;">Your Nation</td>
+				<td style="padding: 14px 18px; font-weight: bold;">Current Turn</td>
+				<td style="padding: 14px 18px; font-weight: bold;">Since</td>
+				<td style="padding: 14px 18px; font-weight: bold;">Game</td>
+			</tr>$games
+		</table>
+        <div style="width: 50%; min-width: 320px; margin: 0 auto; position: relative; font-family: 'Segoe UI', Arial, Helvetica, sans-serif; margin-top: 20px; margin-bottom: 320px">
+            <a href="https://github.com/yairm210/Unciv" style="position: absolute; left: 0; top: 50%; transform: translateY(-50%); text-decoration: none;">
+                <img src="cid:uncivlogo" 
+                    alt="Unciv Logo"
+                    style="height: 34px; width: 34px; vertical-align: middle; border: none;">
+            </a>
+            <a href="https://github.com/cy-elec" style="position: absolute; right: 0; top: 50%; transform: translateY(-50%); text-decoration: none;">
+				<img src="cid:githublogo"
+                    alt="My GitHub"
+                    style="height: 34px; width: 34px; vertical-align: middle; border: none; font-size: 0;">
+            </a>
+        </div>
+	</body>
+</html>
+    """
+DEFAULT_DIGEST_HTML_ROW_TEMPLATE = """
+			<tr style="font-family: 'Segoe UI', Arial, Helvetica, sans-serif;">
+				<td style="padding: 14px 18px;">$nation</td>
+				<td style="padding: 14px 18px;">$turn</td>
+				<td style="padding: 14px 18px;">$since</td>
+				<td style="padding: 14px 18px;">
+					<a href="https://unciv.app/multiplayer?id=$gameId" style="display: inline-block; background-color: #006398; color: #fff; padding: 6px 14px; text-decoration: none; border-radius: 6px;">Launch</a>
+				</td>
+			</tr>"""
+
+UNCIV_IMG = """iVBORw0KGgoAAAANSUhEUgAAAEcAAABHCAYAAABVsFofAAAACXBIWXMAAAGJAAABiQGeLhE1AAAAGXRFWHRTb2Z0d2FyZQB3d3cuaW5rc2NhcGUub3Jnm+48GgAAFClJREFUeJztnHl0VdW9xz/73CkjGchESBhCLgkyBEgIg6LGAfTRQq1TAWvV2r461AHRonZ8T4vPAWufr7U4UIeignXAARDx4cAcgmFMSIIJCZCQQKY733vOfn/ckJube3NzWK9J31uL71p3rZzfPr99fvt79m/v3/7tfSKklJxHeCj/bAP+L+M8ORFwnpwIMA72A3NzC9KEYtoATDgHtQNS815VXV1+aqDsCodBJ0co5idS0sdOmVFyj26dHf/9xyktTUeeAG4bOMtCIQZzthqTP7VI0Qw75i96wZA5olC33olje1i3+meqpqgzairKSgfQxCAM2pgjhFCEpqzIyb8sIjFChMoyRxSSk3+ZQWjKs0KIQbN50B5ktRbdaDJaZs8suTekzOUGuwME8MpaydFjob15Zsm9mIyWi6zWohsHwVxgkMgpKCiIlUIun1S8mPiEzJDy0n2SjV9KNm+TXDELsjNDu098QiaTihcjkU8UFBTEDobdg0KOw2FcGhuXNnLKjFtCyhoaYcxIWHCloL0T0lMEDSclre2h9UyZcQux8WkjHA7j0oG3ehDIGTOmaARCPDj9krswmWNCyjs6JW+uA58K18wVnDot2fAl2B2hrmUyxzD9krtBiAfHjCkaMdC2Dzg5ioHl6ZkTY63jrw5bfoFVkJwo8Hr9ZDjdMDpLkDUszMgMWMdfRXrmxFjFwPIBM7oL5xznTJgwK9njcS+QUkT1e7Mik4RQFs66/H76mmRcbmjtkERZ/GQkJQi+bZBIKcLOXEIozLp8Ce+/cdtCa17hQTTR2r/VssPlsrxbX7/N2f+9AZwTOULcYMgd6/4w0eibFWNQdelk5M4hffikPsvXfeYfhI1GcLshOQFysuHr3ZLZxeF7T/rwiRTNnCdaT21+XI8Np097aW31/A24SZfRXTinIDA3b9rNUUJ99bHRB0k2eXTpeKJHsP/yQ2jG0AmmokZSug/SUqDuBDQ2C8xmyRUzYVsZLPwupCSHI0hy/dXPMWJYpS4bvim3ceONhzUkl1RWln6tS4lzGHPy8y+KF1L+/urkRt3EAJidxxhW/VSI3OmCDV/ApHzYtE1QWStot0Nzq+C9TYKSGfD3DRDu3VlHfaObGIDJBXHMnz9U0TTxrBA3GPTq6SZHVd3Lhpo8w+ckN4Ut92jg1cLrZlQ9jdlRFyT7cLPkwiL4+Avo3X6XF7bvhZHD4evS4FKjwcvFRe/pNbsbDyzJIjZOKbJaa27Wq6OLnLy84hyEXHJd6nEsSigDNi88tx9eqgAtzJtWVDvZhx7uvq6pk3g8cLwRTreHH1cq6wTxsfDNIWjvDMinjv+cxCHNeswOQkaGmZ/+NAMQj1utM4bo0dE1IGtSfdIaY4+aNuRMt6yyDVwqpEbDtkZQJbR74LPjUDAUajshOw4yu0Kb5ONvc2r0HXQOnc2xEzB+LBxvgkum9WBT4l9DdMHtgbwcwckmSUK8IC6mjekFG8IbKQkoi/Dj6G23ZrB2bcuwhuPuR4Bl/bW73wE5N7eoxKDIzY+OqhCjohwA2H3w/AG/Pb3a022nAGJN8PPxAbk9sYjDl+yg8bTCm+vAYukygoBriR76ElBV+PENgugouGr2a4y3bg9rZ8PWtfhc/i4Wm5ZD6sRLw963fv0Z7rm3xi01OaG6ek91pLZH7DklJSVGobDiwoTT3cQAxBr9PeaUM5SYsw0EGB0XLI9tK2XosdeQI2/l3ltDx5pwULoqy0it5YLcHWHv0XxePPZWkH6Xd3e0EEx5AFddlcz04lOWnTs7nwKuifjsSIX1Jzpui1bUydekngiSqxI6vYHrtGj4lxFw5XCIMwXkrZ5Q8rIOP4rB14EQ/ob39wMQQlJS/A6iD3dR3U4MJgsGczQGczRS89KXRwgBjzwyAoOBBXl5Uy+P1P4+yRkzpihBSPFv84Y2kmAMMFFvg7eqwenzX1sMsCgXJiVDYSpcnxMg5Lgd3v0WzrgD9ZpcJxl25Nwi/7zRpWSm14QWSKjb8gYN29ciVZW4zHGY41JQ3U5qN79MY9nGsPVdcEEM116XKjSpPCNKSvr0nr4LjMo0BTX94sSWIHn5aai3B67ToiCqR+SQFu0nzNUVQFe2w7AYmJEeuCez4UWGXfc7pMHc1+ODMPWCTWHlqteF6rYBfgfydLbg7mhCU/1xmMd2hr7c66bFaaxZ01wwqrEtC6gNV3+f5Ahh3unTXMc/b00d/t2Uk93yKSl+l6rz28Qpl78XRXfV1OQIECOA/ETISwyuO3v+3YyaoY8YP2YDq3tbiNfWTmCGoosYX7dMddmQqg9hCI37XlnViETurq2w1vf11IizVW5e0Y+ihPbXx3IOkmwMRMWqhP86CI4u10qJgqJU8Kiw85R/NgPIioWbrMF1WlKyKfrTYQxR55Kv0oDlQAMAUpOc2Pk+UvOiqV6GZE3A2VKHz2VDIolJGYmmenG3nkAYzJjjU0ibVNJdW3m5jetvOKwJIi8nIg7INUdy3nBryq6/nxoeJDeI4IG3xQUb6uHzEwFiABLCdI7RP1qumxiHw4Hb7e4y87puuc/ZgbujCY/tDD5nJ+72ZlxtTXidHV3Xp3C3NeF1duKxncbRUtftWVLC47+vR2pibX/rrIjkSLlGlZpy/86OJFntDMzLdh8061j8n3W9sxiSP4u0ixcB4HQGV7Bs2TJmzpzJzJkzKS8vB2Dr1q3U1Z1dduQBUwDw2oPThM4zDUgZyBJ47W34nIGwWvO4UT0uANatO83evTaHpsmH+rO/3wi5unrXNuvYotVvNWUtfmRUJQqSWCN8f3RXhBwF25rgSJe9hakw+WyE3KODCMXAmNuf7d5eWLVqFXfeeWd3eUtLCykpKaSlpdHZ6W9YqMtfAxwgOmU4Iy75YQ95+EG3JwyWKOx2laefaQAhnqqp2X2sv7brWj5ITXn4W1fs97a3J8demHAaAGtCoHxuFnzb6Xe1yzP98Ulqr1RYWskPiR9bDEB7ezuHDx+mrq6OkSNHAuDz+Thz5kw3Ia+//jqffPIJFouFhQsXMnfuXCAVuByhbMB4TmOWHy++2Ehjo+dYTLQ3NE0QBroWntXVu+qRPPle83BcWujIH2uCeybAj/MCgVtPGKKHMOqmx7qv9+7dy/PPP8/KlSu7ZTk5OSQmJmLpWlNUVVXhcDiw2WzU1/ecUOYCvaY/HWhocPPKqkYEPFxeXm7vX+McUhaOBJ5uVU11n5zOCFtuUsDYR23Z1y3DMjQwqL/88ssArF69GpfLxfr160lKSmLOnDlERUXhdDo5efIkqamppKenU1VVhcvl6tKOAhboNbsbTz3dgNOhba2q2vOWXh3d5BwvLXVI5C8+PZNGs9ei26iojByyFtwXJLPb7cybN4/Zs2fT1NTEypUrWbp0KQsWLGDHjh3U1NSgaRonT56kurqaiooKamtre9QwHRil24bduztZv75VVRSxRErZR9YpFOeWYFcN9V6DJp975DoRM67//DrAlVEXUWyODq5GVfH5fHi9XjZs2MCQIUO49tpreemllzCb/fO/3W7H5XLh8/nC1CrY8ta9VO7Wly8/UPcFUj7mUVUadSl0QTc5Qggl11r4jGVeqvDOTiXMnltYvM8BFnCCXAI7nW63G7vdjtHof3xHRwc+nw9N01AUf2dua2vDZrN1k9gTzfVQ9lkUmqrvBY2Im096/AfRjZ37nwAW6TRdv1vl5k5dJKINM2KXju73XldLB5rPH3f4UPkjHyB7TLU+nw+Px9Md6zidTpxOJ1LKbnLOQvTan5EStrwNmr7Nj646FGaOvh8FcWPuuOJZevV0kTNhwoQ4hFgefftwlMzQ8Ub6Am7cXHqE/X95H80dcIfdHOErDvQyWHQToShK99/JyckAmEwmDAYDBoOhu4cB1OyFuoN6mxdAevwkclOvUoSq6T6poesmj8eyTMm0ZEXfnhW23NvpxGd3U/fRdo5+9DVpk8dijA0m8T9Zhxu/e8THx5OcnExaWlr3dVxcHIqiYDL51yVpaWkkJSWRmJjYTZjPC1vW9G3n17vXs6Ms/AoeoHjk3ZgMMcVW61RdSfZ+ycnPnz5aIpbELh2NiA6/q2FOisXncDNi7nSm3HcjI+fNCLmngRbW8CUAcXFx+Hw+mpubSU9Pp6KigpqaGhISEsjOziYhIYEtW7ZQUVFBdXU1+/fvx2w2U7YJ2sJvfgDgdNkpP7iDltaTYcvjLOkUDL8ZqTPJ3m8O2ZpXtMY0dcj1CasLgtN6Ek7vP8qZg98ipfS7idmE6vYgDAqpk3JJHBe81x9LFG/zMEPRlfwPgr0dXn4YPBEmqE1fvUNVzQGio2O4+rIbyUgdGXKPT3Oxpux6Ol0nl1dVlT4S6ZkRybFaiy/BoH2euHayYpwYH1R2/PO91H+5N2KDcuZdSNq0vCDZd5jOo/wgol44bHwF9n8V+Z5NX70D+HvQicY6Zk+/ivFdS5aeqGnZxGeVDzsVoUyorNx1tK/6+nSrkpISI0JbEXVNeggxqsvL8a3lkS0F6j8vRarB5H/CLiroM78UFk21cGCrvntTk4cx/8ofMX/uzZQf2knl0dAXOCblCoYNmRKtSfXJSHX1SU5Dg/1CTGJqzH2hXdPZdAZN7T/Q9DpceNqD8xYakud4D+neBzp+qqOCz1d3byzoRmbaKK6f9xOqag8SumIXTB/1c0B8Pze3OLuvOvoMAqXkqPBKp7esM9pytaV3mW6Ec9uhnRsRJ0LPBoaDIg1otm1AqHv0B5Mpion503C67ERHBe8TnWjfg4BGl9vY0od63z2nunpXPYLnHE99i3QFvzbzkNATWmErNxgwxQUvHSyaj7uadR90QAiVSy9fghDhu05bRwvbyz5lW+kGOm1tIeXZGblYep0oc3ia2dvwV6QUv4p0ZifyVK4Zl/saXCedqxqCxJbkIcSk9J82iB+ZgcFiCpItat3DMG9Hv7o9MTxrK/njQhfTNkcb73z0Inv3beObAztobGoIuUdRDCFR9666P+FV7WXVU0b/NdJzI5JTVbWjQ0E+6vxLA1pjj80nJMNnF0RSBSBr9uSg6zSvjR+eCZyx1jR4Z6Ng/p2CggUKMxcamPw9hdt/KdhzMHjZcPGlyzCZgtMwJxpr8XjcQbLey43eONV5kCOnPpaKkPfJNWsiLkL6DQKrqspelXat1P5MbZB86KQxpE7M7VNv+KxJxOcE537uaNlKtOaPkk+dhjk/FrywVuGumxW2rYVtb2t8+qpg1jSFRQ8JHnzSf5ASIH5IPdOmByfwMjNGYbYExkOj0UT28L5tkmhsr12BFNrayso9/QQGOk92jckrukgRfJn4ZoEwTukRwGmSE1+W07yvGmO0BalJNK+PjOILSJuWHxQ0TnSe5IVja1CQ2Bxw8WLBwmsUlt6sht1vt7sFix5UyE5Ref7XfpnXG8uqlw7S0R6YQds6mjlUVYamaYzLnczQpGF9tqO6eQObj/zSYTSo4w8f3lvbX7t1H3vLHVu02jQ5fmHiWwVhcqHhzkkEoCBZWfc2413+dMqDTwm80sAfHgqXqwnA5RXM/IHCkw+oXNm1lq44/AM++uBNXTb3hFd1smbv9XS6G/+9+kjpr/Xo6E5ZSJVlvm867e4Pwx0ckn387cfc9opuYmwOePMjwW/u8vtLebWBW39lwqf5Ca8+rrD4FyacHkGUSfL4ElixKvAy8vLXkJXdr0eEoPz4a9jcjfVRZlfEwK8ndJNTU1N6DCGetj9Ti3ToT6bEaB7uaAmEt6UHBLOKBEmxfhJL9wv+9p4Pm8tvyr5KhTfXeWlp8y9yr5ylcbBa4WzMKYTGpZctQQj9NtjcjZQffx2kfOTAgQO2/jX8OKc0aUyU5ylHk7yl42eHRhqy9WXh5k2oJ3VqwB6nSzJuTGB/e/F3fBROMJIY43ex+Zeq7HrXSHa6DySYFElWpggKPDOGlWJOu51Pt+bosuG0vQqfdG6rri7rveEeEedETnl5ud1qnXaNd3vbHd6dsn92pEj/YIOYc9cLRpKGBMYXW9c5qL9vNvPupxqF46G6zojZ5D/BXlUHv/6jkVXLIT3Jh63XRkprh5HXNu2lrXP/pwgZIYlxFqJTNcgnzyW57rdfygH7FRYWmnKthYd+e98IKSuQsgK5b52QMwsNUlYij25RpMUszp6eC/pNGmeQWiWyeZciR2cpUjtMdx2/vW+EzLUWHiosLDQNpP0D+u1DaWmpVwrxwFsbUzhS519GjM+VtLdr7D6kMDpD4w+/MaD0mv2GJius+g//uceVawXfLZHdR/2P1EXz1sYUpBAPlJaWens/8x+KgWS+K0wQVmvhx7fcYO1++x/8CTllgkG2lwkpK5C73jfIe241ysXfM8rf3meUx7cqUlYg96xT5IhMIU985dfTDiNvucEqrdbCj+kKQwbU9oF+gJSSsWML83Otha5NryZ2u8Yv70AWTzHIik2GbtnZn1aJ/PAlg8zOVOTGlwPyTa8mylxroWvs2ML8wbB70D6AteYVrhg1zHP/x88fxGzyP/ONdYJfPgfFkxUunS5ITYKjDbBus0T1aPz5d5Ip4/z6Hq9g3t3jqT1pfraqcs+SwbB50MgZOXJSktlirnjo1oa0n3w/MMG43P5vH6rqJFIDkwmmTxJMmySDAvEX303nyVVZpzxuT35d3T4dnxH97zGon06PHVv0s7gY9c+f/uUgKYn6x9KWNhNz/nU8NofhjiNHSl8YQBODMKj/rqGqKufFToehfMXroR/BRsKK1zPpdBjKq6pyXhwg08JiUHsO+Hc0FIP22dAEr+4A9HS7yaepyhVVVbu+GEjbemPQyQHIy5taoCLy9d5vQFZUVpb1v93xD8Y/hZz/Lzj/L2Ii4Dw5EXCenAg4T04EnCcnAv4HFd70tCj9PZYAAAAASUVORK5CYII="""
+GITHUB_IMG = """iVBORw0KGgoAAAANSUhEUgAAAGIAAABgCAYAAADmbacFAAAACXBIWXMAAA7DAAAOwwHHb6hkAAAAGXRFWHRTb2Z0d2FyZQB3d3cuaW5rc2NhcGUub3Jnm+48GgAAD2NJREFUeJztnXt0FFW2xr9d3Z1AAiRiQgJJ6ISkkzDgCCFDAJEQeSjo+JjFGxEVx7mOiopyUQQBHzPXcTFzdYBZd9ABRAfEB6MyykIe4iAMTngIEZJ0J51+AQmvcCfk1d217x/BQJOk01V1utOB+1srayVVdb59qnaqTtU5++xDzIxw5UaTqUd0g5zJkpTF4GwQZYKRDCAaQHcAsZd+1wH4N8AXAKoBcJGAkzKhBIxSgIvJYyhxOo+f7cDT8QuFkyPis7O7R9RxHiR5rMQYy0AOABJngU+CaA/JvF024EuXxeIQp62NDndEWlpaohv66cyYQU0XXgqZccJRMH8gS/J7J8rLbSGz21pVOsIRJpMpstbD9xFLswAeD0Af8kr4IgP4BkTrGi9GfFRVVVQT6gqE1BGJiTdHGyLrHmHi5wAkh8ywMs4SYYUkN75ps9nOh8poSByRnp4e0+DVPQnwUwDigm5QDBcArGS39AeXq+RMsI0F1RFEREl902eB6A0AvYJmKLhcIKYlTrt5BTN7g2UkaI5I6pedRbK8EuAxQTEQeg6D8JjTav5nMMSFO4KoQJ9kdC4DMB+AQah4xyMz8YooPf2n2WxuECks1BHJyaZk6GkDwCOFiYYnh8jLUxwOi0WUoLB39iRj1ljoUXgdOAEABrOODialZUwTJSjEEcmpGS8SydsAJIjQ6yR0J6YNSWmm/yIizV//mh5NRERJxow3ADyrtSKdnPWJcTFzCgsL3WoFVDti4MCBERdq6tcyaLpa49cYW8hbP8XhcNSpKazKEQMHDoyormncDPBENUavYXaTt36CGmcobiOIiKovNqz+fye0Sj7rumwiKlDcd6bYEUnGjOVgPKC03HXEXUlG5xqlDbgiRySnmV4A8Iyial2f3J9kzHhVSYGA24iU1IwJDNqCUI4XdHKYaIbLWrohkGMDckRKSlYS6+TD6Dw9p+HCBR1LOTZbSXl7B7brCKICfZ++zh1EGKW0FvOffQZZWSacP1+N0lIz9ny7D8eLi5XKhBwiQv/sLNwyYjgyM0244YZYlJSY8cbyP6gR+1dsdMTIoqKiRr+HteeI5NSMlwFarNR+fFwcCvfvgU6n89nucLqwYeMmbNz0IaqqTiuVDSoJCb0wbcokTJ82BclJST77PB4vhgwdgbPnzqmR/r2zwuz3o9evI3obTT/REQ5DRS/q7Fkz8dorS9vc73a7seGDD/HWilU4dapSqbxQevdOxNwnfo3pUydDr2/7zXPBwsV4/68b1Zjwysx5J2yWA20d0GbDS0SkI6yEyq7sEcOH+d1vMBjwwP0zsOfr7XjxhQWIiuqqSF+v1yEmJgaxsU0/MTExiusYHR2FRQsXYM/X2zFr5nS/TgCAEcPzFNu4hE4iWklEbV/vtu6IlFTTTAbeU2t5/97dSOrTJ+DjnS4XFi5aip27vm6qGBEy0vuhf3Y2TKYMmDLS0bt3IhISeiE+Lg6RkZGt6tTV1eHEyVM4c+YMbHYHLGVlMJstOHasGK4TJ5qPG3PbaLz2ytIWjyB/2Gx23JKvfpyLmB912Cyr29jX0hHx2dndI+s9JQD1VmMwKqorSo8dUVMUW7d9BTDjZz/LxY09e6rSaItTpypx4OAh6PQ63DF+nOLyzIz0rIFobPTb7vrjLHkjMx2OohYNTav3YpcG7+Os0gkA0KuX+uFpNRcoUBITE3DnxDtUlycixMfF+dxZCrkR+oa5AJZevaPFMyslJaUrM55WawkAoqOitBQPa7p176apPDPmxmdnd796ewtHyLrIOdA4wOOVZS3FwxrWfm43RNTJj1290ccRubm5BgI9p9XSmdNBDwPqME6f0X5uRDwvJSXF5zXRxxGnTl+4B4BRq6EzZ8+iuvqCVpmw4/z5apw/Xy1CKoGlLpOu3ODjCALuF2EFACxlZaKkwgazuKCNFte62RHJyf1vZMIEUYa++cceUVJhwz/2fCtMiwljU1Kymj9imh3Bes80ABGiDJ08eUqUVNgguCtGYp23ORyn2REEzBRl4Sf9s7H0pUWi5MKGZUsW46aBAwQq0ozm35j5UrS2dBZNU6A0ERkZiS8++wRZWZlapcISm82O2yfejZqLF0XIMbulXi5XyRkJAOo90igIcAIAPPXkr69ZJwCA0dgX856ZK0qOJAPnA5ceTUQoEKGa1KcPfvXLOSKkwpqHZs+C0dhXkBoXAJfbiNtESD4y58E2e0WvJQwGAx595GFRcgUAQPHxA7pFRDVcgMaggMjISBwu3Ifu3Vt0o1yT1NbWYVBuHmprVQX2XQkbyNNTMkQ1ZEJAZEZB/qjrxglAU1f/bQWjRUiRB4YsCURZItRGj1YcW9Dpyb9V0AwEmU2SBBbiiNycwSJkOhVDhuQI0WHiTIlZ+x2h0+mQnt5PRJ06Ff3SUltEqahDMkkAp2iVSUxIgMFwrU2Xax+9Xo8EDaORl+G+Egg9tMr06KFZotPSI0bEuVM3CYxorTJdulz73w5t0bVLF80aBO4uAdrvCI/Ho7kynRUNER3NMNBNAqBtNBxNsUTXK3V19SJkukkQMCldUGU6JfX1Qs7dIAGo1apy9tw5dHTep46AmdUGJftAQK0QR9TX1+PM2bDN0hY0qqpOo6FBeyYIBl+USIAjAMDpdImQ6VQ4nE5BSlQrMSAkPqS4pFSETKeiRNA5E1AtEcMuQuzgwUMiZDoVhQfEnDODbZIssZCkgoUHDoqQ6VQIO2cmu7A7wmwpg6Ws3Tl71wyWsnJYKyrEiEmwScwk7OH+9y+2ipIKez77fIs4MSazZCBDoSi9jz7eDK83aGnvwgaPx4uPPt4sTM8teQqliopjJwEIefe0VlTgy63bREiFNZ99vgV2h6hXV9gry8srm8JpGMLuijf/uAoez7V7V7jdbry1YpUwPQYdAC4FDTDhG1HCx4uL8fZf1oiSCztW/unPQl9KiPgb4JIjZNCXwpQB/P6/3xL2sRNOHDlyVOjdAACQ5C+AK2aVpqSayhlIE6XfNyUZWz79BD173iBKskOprKzCnff8QnREeJmzwpwB+MYzfSHSgt3hxMwHHsK5cyFLrx00KiurMG3mA8IzJDCo+Zo3O0JmDiidjRKOFv2ASVNnoKKiQ1cE0MTx4mLcN3kazBbxM6AIl695syNO2Mv2gmEWbazUbMGEu+7F3z79XLR0UJFlGWvffQ8/v3cy7PagrPdR7Kww7/vxj8szhpgZxOuCYfHfNTV44ql5mDZzdqdIE7T/u0Lcde8kLHppmagRuBYQY63v31eMrDWllEY52hk+nXDHeIwfNwYEQqnFgm3btgf8SkdEGHPbaDz84GyMvGU4JCk8EqI1Njbiq+078c6adfjuX8I+q9qiQQ9D2qWPaQCt5OJINmasAdGD/lQOfrcXvXrFN//NzNi5azcWL1mm6Iuzd+9E3D5uLEYMH4ZheUND/obldLmwd99+fLt3H3bs3BWyKckMrHZVmB+9clsLR/RJzewvgYvgJ0J8SM5gvP3nVYiP880sV3PxIh57/Cns+nq34spJkoTsrEz89KaBSEtLRarRiLS0VPTPzoLWjM8ejwfHjhej3FqB8vJylJVZcfjIEdhsQjqeleIlr9zf4SjzaY9bzU6TkmrazMC9/tQSExOw/He/Rf6oW322u91uzJj1EPb9c7/mGj8372k8PfdxzTrMjPkLFmLjpo80a2mG8KHTap7SYnNrjjAaTQO8TZnL/GaS0ul0WLJoIR5+yDcNbHX1Bdx5zy80/ccVjM7H+rVvqy5/NR6PF/dNmopDh78XpqkCN0u6m1zlxSVX72j18WOzmX8A0GqCpyvxer14adkr+OuGD3y2x8bGYPnvfqu6IdbpdHh12UuqyraFXq/DwufnC9VUDPGq1pwA+GkHvAYsQdOCR+2yaMnL+OHYcZ9tw/KGYvYsdVO380fdKnCy4GWGD8tDzuBBwnUD5Bx5urzc1s42HXHSbD7NwMJALDQ2NmL+8y9CviqFzkuLXsCwvKEB1/RH7vn5nYrLBErB6PygafuDgAWtZS77Eb/PjhM2y58A2hGIoSNHjuKTzZ/6bDMYDFj3l9UYna9sWtegQTcrOl4J+aNCv+ALA1udNss7/o7x6whmZlnyzCHgfwMxuOp/VrcIvYyOjsK7a1bj1ZeXoE9v/9np9Ho9Jk64HWmpmjMVtUl6P2EdzIFSTR78ktuJSQ0oJXWy0TQLhHcDsbp+7dtt3v5utxvbvtqBwgMHUWq2QJa9MBgi0C8tFYNu/ilG549CbKzytKFKYGb0yxwAt1v14ifK7BFPd1kt7SaLVZCk3fRHBp5o77ghOYPxt48/0PwRFkxyh40MVdLfdjMg/0jA75cJcTHzmNsfUj1w8BDWrlsfqGyH0LWLsmS/KtnpsiUvCPTggB1RWFjojpA8UwG02zG/9JXfeLdu+ypQ6ZAjc9CTPxazW5rKvCvgqVSKvrisVuspHUvjAT7p7ziv16t79D8el9etf98TjvMmBGSq9Ied9Txe6UKzij99bbaScpLkOwD4HQOVZZZeXLxUf/d9k2tC0K2sCFkO2j/HaZZ049WsHK96+bOkVFMOAVsBxLd7MABTRjqPGzeGcnNykJpqREKv+KYuECKcP3cepyorYbGUwSvLmDUzuCuq5Y3I15LNuC1OSDLfbrdbitQU1rQgYNMKvd5tAIT1R+QNzcXHm4QPn/sg+q2JACu8PF7L2qWahsdc5cUlrOeRAFT9F7SG1xv8LMoi2y0CDujJM0LrArKaxyldFoujsTZyOAgfatUCEJIgZlFtBAPvy+7aUVarVXNKT8UL17VGVVVRDRFNTe6bcYAJr0FDfsBQ5BUX8NbkZvA8V4VlhYj6AAKXMmNmdtjMrxPRLQBUh2rIobgjtH1HFMnMw0U6AQjCmnIOa+l+A3kGM+F1AIqv6tVd6cFApQ0PE17vakCuv7WC1BKUWBar1VrvspqfJ0kaAWCvkrIheTQpbiJoB0neIS6r+Xmz2ax9YnUrBDWoyFFe8p3LZhnJxNMBBBR3GZJHU8DO5hJm3O2sKB3rKC9Xt1ZPgAQ9uouZ2WW1bIztFpnJwCMA/MbrS0IygvlHr2/XxvdMNMNlKxvgsplDEisasjC7oqKiRleF+R2XzdIfjMkAdgNo8ZAYEoLcgIMHtTpu7QXwJYEnumyWwS5r6QZmDtnUJ01f1loxGrP6yZI8mxkzDAaDccSwPMNbby4XvtrW1djtDjz59LP4/sjRRrfHY5YI75FX967dXiy83yNQ/g9BNuTnV5LYVAAAAABJRU5ErkJggg=="""
+
+
+class MailTemplate:
+    """
+    Text with $field or ${field} placeholders ($$ for a literal $), split once into
+    literal parts and field slots so a render is a single join.
+    """
+
+    PLACEHOLDER = re.compile(r"\$(?:(\$)|(\w+)|\{(\w+)\})")
+
+    def __init__(self, text, fields=TEMPLATE_FIELDS, escape=str):
+        self._escape = escape
+        self._parts = []
+        self._slots = []
+        pos = 0
+        for m in self.PLACEHOLDER.finditer(text):
+            self._parts.append(text[pos:m.start()])
+            pos = m.end()
+            if m.group(1):
+                self._parts.append("$")
+                continue
+            field = m.group(2) or m.group(3)
+            if field not in fields:
+                raise ValueError(f"Unknown template field ${field}, expected one of {fields}")
+            self._slots.append(len(self._parts))
+            self._parts.append(field)
+        self._parts.append(text[pos:])
+
+    def render(self, values):
+        parts = self._parts.copy()
+        for slot in self._slots:
+            parts[slot] = self._escape(str(values[parts[slot]]))
+        return "".join(parts)
+
+
+def text_part(text, subtype):
+    """The flattened text part, ASCII bodies skip the email generator as they go out as is."""
+    if text.isascii():
+        return f'Content-Type: text/{subtype}; charset="us-ascii"\nMIME-Version: 1.0\nContent-Transfer-Encoding: 7bit\n\n{text}'.encode()
+    return MIMEText(text, subtype).as_bytes()
+
+def image_part(cid, data):
+    """The flattened inline image part, base64 wrapped at 76 characters per line."""
+    part = MIMEBase('image', 'png')
+    part.set_payload(data)
+    encoders.encode_base64(part)
+    part.add_header('Content-ID', f'<{cid}>')
+    return part.as_bytes()
+
+
+class MailTemplates:
+    """
+    The notification templates and inline images, compiled once and recompiled
+    whenever one of TEMPLATE_FILES in `directory` is added, changed or removed.
+    Missing files fall back to the built-in defaults, broken ones keep the previous templates.
+    """
+
+    # name -> (default text, allowed fields, escape applied to the values)
+    TEXTS = {
+        "plain": (DEFAULT_PLAIN_TEMPLATE, TEMPLATE_FIELDS, str),
+        "html": (DEFAULT_HTML_TEMPLATE, TEMPLATE_FIELDS, html.escape),
+        "digest_plain": (DEFAULT_DIGEST_PLAIN_TEMPLATE, DIGEST_FIELDS, str),
+        "digest_html": (DEFAULT_DIGEST_HTML_TEMPLATE, DIGEST_FIELDS, str),
+        "digest_plain_row": (DEFAULT_DIGEST_PLAIN_ROW_TEMPLATE, TEMPLATE_FIELDS, str),
+        "digest_html_row": (DEFAULT_DIGEST_HTML_ROW_TEMPLATE, TEMPLATE_FIELDS, html.escape),
+    }
+    IMAGES = {"uncivlogo": UNCIV_IMG, "githublogo": GITHUB_IMG}
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._mtimes = None
+        self.refresh()
+
+    def _path(self, name):
+        return os.path.join(self.directory, TEMPLATE_FILES[name])
+
+    def _read(self, name):
+        if self._mtimes[name] is None:
+            return None
+        with open(self._path(name), "rb" if name in self.IMAGES else "r") as f:
+            return f.read()
 
-    plain_mime = MIMEText(plain, 'plain')
-    html_mime = MIMEText(html, 'html')
+    def refresh(self):
+        mtimes = {}
+        for name in TEMPLATE_FILES:
+            try:
+                mtimes[name] = os.stat(self._path(name)).st_mtime_ns
+            except OSError:
+                mtimes[name] = None
+        if mtimes == self._mtimes:
+            return
+        first_load, self._mtimes = self._mtimes is None, mtimes
+        try:
+            self._compile({name: self._read(name) for name in TEMPLATE_FILES})
+            logging.info(f"Reloaded mail templates")
+        except Exception as e:
+            logging.error(f"Failed to load mail templates from {self.directory}: {e}\n{traceback.format_exc()}")
+            if first_load:
+                self._compile({})
+
+    def _compile(self, overrides):
+        texts = {
+            name: MailTemplate(overrides.get(name) or default, fields, escape)
+            for name, (default, fields, escape) in self.TEXTS.items()
+        }
+        images = [ image_part(cid, overrides.get(cid) or base64.b64decode(img)) for cid, img in self.IMAGES.items() ]
+        self.texts, self.images = texts, images
 
-    # last part is preffered
-    msg.attach(plain_mime)
-    msg.attach(html_mime)
+    def _message(self, subject, recipient, plain, html_text):
+        """
+        Returns the flattened multipart/alternative message. Only the headers and the
+        two text parts are serialized per mail, the image parts were flattened by _compile().
+        """
+        # last part is preffered
+        parts = [ text_part(plain, 'plain'), text_part(html_text, 'html') ]
+        boundary = f"==============={uuid.uuid4().hex}=="
+        while any(boundary.encode() in part for part in parts):
+            boundary = f"==============={uuid.uuid4().hex}=="
+        # Without a payload the header block flattens on its own, the multipart framing is written here
+        head = Message()
+        head["MIME-Version"] = "1.0"
+        head["Subject"] = subject
+        head["From"] = SMTP_USER_FROM
+        head["To"] = recipient
+        content_type = f'Content-Type: multipart/alternative;\n boundary="{boundary}"\n'.encode()
+        delimiter = f"--{boundary}\n".encode()
+        body = (b"\n" + delimiter).join(parts + self.images)
+        return b"".join((content_type, head.as_bytes(), delimiter, body, f"\n--{boundary}--\n".encode()))
 
-    msgImageUnciv = MIMEBase('image', 'png')
-    msgImageUnciv.set_payload(unciv_img)
-    msgImageUnciv.add_header('Content-ID', '<uncivlogo>')
-    msgImageUnciv.add_header('Content-Transfer-Encoding', 'base64')
-    msg.attach(msgImageUnciv)
-    msgImageGithub = MIMEBase('image', 'png')
-    msgImageGithub.set_payload(github_img)
-    msgImageGithub.add_header('Content-ID', '<githublogo>')
-    msgImageGithub.add_header('Content-Transfer-Encoding', 'base64')
-    msg.attach(msgImageGithub)
+    def build(self, recipient, values):
+        return self._message("Unciv - It's your turn!", recipient,
+                             self.texts["plain"].render(values), self.texts["html"].render(values))
 
-    with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) as smtp:
-        smtp.login(SMTP_USER, SMTP_PASS)
-        smtp.send_message(msg)
+    def build_digest(self, recipient, games):
+        plain = {"count": len(games), "games": "".join(self.texts["digest_plain_row"].render(game) for game in games)}
+        html_values = {"count": len(games), "games": "".join(self.texts["digest_html_row"].render(game) for game in games)}
+        return self._message(f"Unciv - It's your turn in {len(games)} games!", recipient,
+                             self.texts["digest_plain"].render(plain), self.texts["digest_html"].render(html_values))
+
+
+templates = MailTemplates(TEMPLATE_DIR)
+
+def send_mail(filepath, parsed, recipient, received=None):
+
+    gameId = parsed.get("gameId", os.path.basename(filepath).replace("_Preview",""))
+    nation = parsed.get("currentPlayer", "Unknown")
+    turn = parsed.get("turns", "First Turn")
+    since = datetime.utcfromtimestamp(parsed.get("currentTurnStartTime", int(datetime.now(timezone.utc).timestamp()*1000))/1000).strftime('%d.%m.%Y %H:%M:%S')
+
+    templates.refresh()
+    values = {"nation": nation, "turn": turn, "since": since, "gameId": gameId}
+    if DIGEST_WINDOW <= 0:
+        with metrics.timed("mime_build"):
+            msg = templates.build(recipient, values)
+        spool_mail(msg, received)
+        return
+    # The turn is already journaled as seen, so the held notification has to survive a crash as well
+    path = os.path.join(DIGEST_DIR, f"{time.time_ns()}-{uuid.uuid4().hex}.json")
+    write_durable(path, json.dumps({"recipient": recipient, "values": values}).encode())
+    hold_digest(recipient, values, path, time.monotonic() + DIGEST_WINDOW, received)
+
+def hold_digest(recipient, values, path, due, received=None):
+    with digest_ready:
+        digest = digest_pending.setdefault(recipient, {"due": due, "games": {}, "files": {}, "received": received})
+        # A newer turn of the same game replaces the held one
+        superseded = digest["files"].get(values["gameId"])
+        digest["games"][values["gameId"]] = values
+        digest["files"][values["gameId"]] = path
+        if received is not None:
+            digest["received"] = min(received, digest["received"] or received)
+        digest_ready.notify()
+    if superseded:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(superseded)
+
+def load_digests():
+    """Picks up the notifications an earlier run still held for a digest, they are due right away."""
+    os.makedirs(DIGEST_DIR, exist_ok=True)
+    now = time.monotonic()
+    for name in sorted(os.listdir(DIGEST_DIR)):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(DIGEST_DIR, name)
+        try:
+            with open(path, "rb") as f:
+                held = json.loads(f.read().decode("utf-8"))
+            hold_digest(held["recipient"], held["values"], path, now)
+        except (ValueError, KeyError, TypeError) as e:
+            logging.error(f"Unreadable digest entry {name}, moving it to {SPOOL_FAILED_DIR}: {e}")
+            os.replace(path, os.path.join(SPOOL_FAILED_DIR, name))
+    if digest_pending:
+        logging.info(f"Recovered held notifications for {len(digest_pending)} recipients")
+
+def digest_worker():
+    while True:
+        with digest_ready:
+            while True:
+                now = time.monotonic()
+                due = [ recipient for recipient, digest in digest_pending.items() if digest["due"] <= now ]
+                if due:
+                    break
+                timeout = min((digest["due"] for digest in digest_pending.values()), default=now + 60) - now
+                digest_ready.wait(timeout)
+            batches = [ (recipient, digest_pending.pop(recipient)) for recipient in due ]
+        for recipient, digest in batches:
+            flush_digest(recipient, digest)
+
+def flush_digest(recipient, digest):
+    games = digest["games"]
+    try:
+        with metrics.timed("mime_build"):
+            if len(games) == 1:
+                msg = templates.build(recipient, *games.values())
+            else:
+                logging.info(f"Merging {len(games)} notifications for {recipient} into a digest")
+                msg = templates.build_digest(recipient, list(games.values()))
+        spool_mail(msg, digest["received"])
+    except Exception as e:
+        # The held entries stay in DIGEST_DIR and are sent on the next start
+        logging.error(f"Building mail for {recipient} failed with: {e}\n{traceback.format_exc()}")
+        return
+    for path in digest["files"].values():
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+def flush_digests():
+    with digest_ready:
+        batches = list(digest_pending.items())
+        digest_pending.clear()
+    for recipient, digest in batches:
+        flush_digest(recipient, digest)
 
 def notify_admin(e):
 
@@ -234,42 +1209,313 @@ def notify_admin(e):
     msg["From"] = SMTP_USER_FROM
     msg["To"] = SMTP_ERROR_ADDR
     msg.set_content(f"A critical error occured in Unciv-Mailer:\n\n{e}")
-    
-    with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) as smtp:
-        smtp.login(SMTP_USER, SMTP_PASS)
-        smtp.send_message(msg)
 
-def watch(mail_map):
+    spool_mail(msg)
+
+def spool_mail(msg, received=None):
+    """
+    Writes the message, flattened bytes or an email Message, atomically into SPOOL_DIR and schedules its delivery.
+    `received` is the monotonic time of the triggering event, used for the event-to-mail latency.
+    """
+    name = f"{time.time_ns()}-{uuid.uuid4().hex}.eml"
+    path = os.path.join(SPOOL_DIR, name)
+    # Claimed before the rename, so a spool_worker() scan in between doesn't schedule it a second time
+    with spool_ready:
+        spool_known.add(path)
+        if received is not None:
+            spool_received[path] = received
     try:
-        proc = subprocess.Popen(["inotifywait", "-m", WATCH_DIR, "-e", "MODIFY,CLOSE_WRITE,CLOSE_NOWRITE", "--format", "%w%f %e"], stdout=subprocess.PIPE)
-        for line in proc.stdout:
-            try: 
-                mail_map = load_mail_map(mail_map)
-                parts = line.decode().strip().split()
-                filepath = ' '.join(parts[:-1])
-                event = parts[-1]
-                if filepath.endswith("_Preview") and "CLOSE_WRITE" in event:
-                    logging.info(f"Processing file: {filepath}")
-                    process_file(filepath, mail_map)
-                elif filepath.endswith("_Preview"):
-                    logging.debug(f"Skipping file[{event}]: {filepath}")
-            except Exception as e:
-                logging.error(f"Subroutine failed with: {e}\n{traceback.format_exc()}");
+        with metrics.timed("spool_write"):
+            write_durable(path, msg if isinstance(msg, bytes) else msg.as_bytes())
+    except BaseException:
+        forget_spooled(path)
+        raise
+    logging.debug(f"Spooled mail as {name}")
+    schedule_spooled(path, 0, 0)
+
+def write_durable(path, data):
+    """Writes via a fsynced temp file, so a crash leaves either the complete file or none."""
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def schedule_spooled(path, attempt, delay):
+    with spool_ready:
+        spool_known.add(path)
+        heapq.heappush(spool_schedule, (time.monotonic() + delay, path, attempt))
+        spool_ready.notify()
+
+def forget_spooled(path):
+    with spool_ready:
+        spool_known.discard(path)
+        spool_received.pop(path, None)
+
+def retry_delay(attempt):
+    # The exponent is capped, past that the delay is SPOOL_RETRY_MAX anyway and the float would overflow
+    delay = min(SPOOL_RETRY_BASE * 2 ** min(attempt, 32), SPOOL_RETRY_MAX)
+    # Equal jitter, so retries after an outage don't hit the server all at once
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def spool_worker():
+    """Feeds due spool entries to the delivery workers and picks up entries left by earlier runs."""
+    next_scan = 0
+    while True:
+        try:
+            with spool_ready:
+                now = time.monotonic()
+                if now >= next_scan:
+                    # Set first, so a failing scan is retried on the next interval instead of right away
+                    next_scan = now + SPOOL_SCAN_INTERVAL
+                    for name in sorted(os.listdir(SPOOL_DIR)):
+                        path = os.path.join(SPOOL_DIR, name)
+                        if name.endswith(".eml") and path not in spool_known:
+                            spool_known.add(path)
+                            heapq.heappush(spool_schedule, (now, path, 0))
+                due = []
+                while spool_schedule and spool_schedule[0][0] <= now:
+                    due.append(heapq.heappop(spool_schedule))
+                if not due:
+                    wake = min(spool_schedule[0][0], next_scan) if spool_schedule else next_scan
+                    spool_ready.wait(wake - now)
+                    continue
+            for _, path, attempt in due:
+                mail_queue.put((path, attempt))
+        except Exception as e:
+            logging.error(f"Spool worker failed with: {e}\n{traceback.format_exc()}")
+            time.sleep(1)
+
+def deliver_spooled(path, attempt):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        forget_spooled(path)
+        return
+    recipients = [ addr for _, addr in getaddresses(BytesHeaderParser().parsebytes(data).get_all("To", [])) ]
+    try:
+        refused = smtp_pool.send(SMTP_USER, recipients, data)
     except Exception as e:
-        logging.error(f"Watcher failed to start: {e}\n{traceback.format_exc()}")
-        notify_admin(e)
-    logging.error(f"Inotifywait quit unexpectedly: Halting watcher")
+        permanent = isinstance(e, smtplib.SMTPRecipientsRefused) or (
+            isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500
+            and not isinstance(e, smtplib.SMTPAuthenticationError))
+        if permanent:
+            logging.error(f"Delivery to {recipients} rejected, moving it to {SPOOL_FAILED_DIR}: {e}")
+            metrics.inc("unciv_mailer_mails_total", result="rejected")
+            os.replace(path, os.path.join(SPOOL_FAILED_DIR, os.path.basename(path)))
+            forget_spooled(path)
+            return
+        delay = retry_delay(attempt)
+        metrics.inc("unciv_mailer_mails_total", result="retry")
+        logging.warning(f"Delivery to {recipients} failed (attempt {attempt + 1}), retrying in {delay:.0f}s: {e}")
+        schedule_spooled(path, attempt + 1, delay)
+        return
+    if refused:
+        logging.warning(f"Recipients refused: {refused}")
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+    metrics.inc("unciv_mailer_mails_total", result="delivered")
+    received = spool_received.get(path)
+    if received is not None:
+        metrics.observe("unciv_mailer_event_to_mail_seconds", time.monotonic() - received)
+    forget_spooled(path)
+    logging.info(f"Mail delivered to {recipients}")
+
+def delivery_worker():
     while True:
         try:
-            logging.error(f"Waiting for admin intervention, service down.")
-            notify_admin(f"Inotifywait quit unexpectedly.\nManual intervention is required immediately!\n\nWatcher halted!")
-        except Exception:
-            pass
-        time.sleep(7200)
+            item = mail_queue.get(timeout=smtp_pool.idle_timeout)
+        except queue.Empty:
+            smtp_pool.recycle_idle()
+            continue
+        try:
+            if item is None:
+                return
+            deliver_spooled(*item)
+        except Exception as e:
+            logging.error(f"Delivering {item[0]} failed with: {e}\n{traceback.format_exc()}")
+            schedule_spooled(item[0], item[1] + 1, retry_delay(item[1]))
+        finally:
+            mail_queue.task_done()
+
+def start_delivery_workers():
+    os.makedirs(SPOOL_FAILED_DIR, exist_ok=True)
+    threading.Thread(target=spool_worker, name="spool", daemon=True).start()
+    for i in range(SMTP_WORKERS):
+        worker = threading.Thread(target=delivery_worker, name=f"delivery-{i}", daemon=True)
+        worker.start()
+        delivery_workers.append(worker)
+    logging.info(f"Started {SMTP_WORKERS} delivery workers on spool {SPOOL_DIR}")
+
+def stop_delivery_workers(timeout=5):
+    deadline = time.monotonic() + timeout
+    try:
+        for _ in delivery_workers:
+            mail_queue.put(None, timeout=max(deadline - time.monotonic(), 0))
+    except queue.Full:
+        logging.warning(f"Mail queue still full, leaving the remaining mails in {SPOOL_DIR}")
+    for worker in delivery_workers:
+        worker.join(max(deadline - time.monotonic(), 0))
+    smtp_pool.close_all()
+
+def scan_previews(watch_dir):
+    return [e.path for e in os.scandir(watch_dir) if e.is_file() and e.name.endswith("_Preview")]
+
+def native_events(watch_dir):
+    """Yields batches of written _Preview paths read straight from an inotify fd, empty batches while idle."""
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), f"inotify_init1: {os.strerror(ctypes.get_errno())}")
+    try:
+        if libc.inotify_add_watch(fd, os.fsencode(watch_dir), IN_WATCH_MASK) < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch {watch_dir}: {os.strerror(ctypes.get_errno())}")
+        poller = select.poll()
+        poller.register(fd, select.POLLIN)
+        logging.info(f"Watching {watch_dir} with native inotify")
+        while True:
+            if not poller.poll(WATCH_TICK * 1000):
+                yield []
+                continue
+            start = time.perf_counter()
+            data = os.read(fd, INOTIFY_BUFFER_SIZE)
+            batch = []
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                name = os.fsdecode(data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b"\0"))
+                offset += INOTIFY_EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    logging.warning(f"inotify queue overflowed, rescanning {watch_dir}")
+                    batch.extend(scan_previews(watch_dir))
+                elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    logging.error(f"Lost inotify watch on {watch_dir}")
+                    return
+                elif name.endswith("_Preview"):
+                    batch.append(os.path.join(watch_dir, name))
+            metrics.observe("unciv_mailer_stage_seconds", time.perf_counter() - start, stage="inotify_read")
+            yield batch
+    finally:
+        os.close(fd)
+
+def inotifywait_events(watch_dir):
+    """Yields batches of written _Preview paths reported by an inotifywait subprocess, empty batches while idle."""
+    proc = subprocess.Popen(["inotifywait", "-m", "-q", watch_dir, "-e", "CLOSE_WRITE,MOVED_TO", "--format", "%e %f"], stdout=subprocess.PIPE)
+    try:
+        logging.info(f"Watching {watch_dir} with inotifywait")
+        rest = b""
+        while True:
+            if not select.select([proc.stdout], [], [], WATCH_TICK)[0]:
+                yield []
+                continue
+            start = time.perf_counter()
+            data = os.read(proc.stdout.fileno(), INOTIFY_BUFFER_SIZE)
+            if not data:
+                return
+            *lines, rest = (rest + data).split(b"\n")
+            batch = []
+            for line in lines:
+                event, _, name = os.fsdecode(line).partition(" ")
+                if name.endswith("_Preview"):
+                    batch.append(os.path.join(watch_dir, name))
+            metrics.observe("unciv_mailer_stage_seconds", time.perf_counter() - start, stage="inotify_read")
+            yield batch
+    finally:
+        proc.kill()
+        proc.wait()
+
+WATCH_BACKENDS = {"native": native_events, "inotifywait": inotifywait_events}
+
+def watch(mail_map):
+    # filepath -> time at which the file has been quiet for WATCH_DEBOUNCE seconds
+    pending = {}
+    # filepath -> time of the first event still pending for it
+    received = {}
+    metrics.gauge("unciv_mailer_watch_pending", lambda: len(pending))
+    failures = 0
+    while True:
+        started = time.monotonic()
+        try:
+            if failures:
+                # Catch up on everything written while the watcher was down
+                pending.update(dict.fromkeys(scan_previews(WATCH_DIR), 0))
+            for batch in WATCH_BACKENDS[WATCH_BACKEND](WATCH_DIR):
+                if stop_requested.is_set():
+                    logging.info(f"Stopping watcher, {len(pending)} pending files are left to the next catch-up")
+                    return
+                now = time.monotonic()
+                if batch:
+                    with metrics.timed("event_receipt"):
+                        for filepath in batch:
+                            logging.debug(f"Event for file: {filepath}")
+                            metrics.inc("unciv_mailer_events_total")
+                            if filepath in pending:
+                                metrics.inc("unciv_mailer_events_coalesced_total")
+                            pending[filepath] = now + WATCH_DEBOUNCE
+                            received.setdefault(filepath, now)
+                for filepath, due in list(pending.items()):
+                    if due > now or stop_requested.is_set():
+                        continue
+                    del pending[filepath]
+                    try:
+                        with metrics.timed("mail_map_load"):
+                            mail_map = load_mail_map(mail_map)
+                        logging.info(f"Processing file: {filepath}")
+                        with metrics.timed("process"):
+                            process_file(filepath, mail_map, received.pop(filepath, None))
+                    except Exception as e:
+                        if not isinstance(e, DecodeError):
+                            metrics.inc("unciv_mailer_process_errors_total")
+                        logging.error(f"Subroutine failed with: {e}\n{traceback.format_exc()}");
+            logging.error(f"Watcher backend {WATCH_BACKEND} quit unexpectedly")
+        except Exception as e:
+            logging.error(f"Watcher failed with: {e}\n{traceback.format_exc()}")
+        if time.monotonic() - started > WATCH_RESTART_RESET:
+            failures = 0
+        failures += 1
+        if failures == WATCH_RESTART_NOTIFY:
+            try:
+                notify_admin(f"Watcher failed {failures} times in a row and keeps restarting.\nCheck {WATCH_DIR} and the logs!")
+            except Exception as e:
+                logging.error(f"Failed to notify admin: {e}")
+        delay = min(2 ** failures, 300)
+        logging.warning(f"Restarting watcher in {delay}s")
+        if stop_requested.wait(delay):
+            return
 
 def exit_gracefully(signalnum, frame):
+    # Interrupting the main thread could land between journaling a turn and spooling its mail,
+    # so this only asks watch() to return, the shutdown itself runs in __main__
+    stop_requested.set()
+
+def start(mail_map):
+    """Loads the saved state and starts every background worker, running watch() is up to the caller."""
+    load_data()
+    if METRICS_PORT:
+        start_metrics_server()
+    threading.Thread(target=state_sync_worker, name="state-sync", daemon=True).start()
+    start_delivery_workers()
+    load_digests()
+    if DIGEST_WINDOW > 0:
+        threading.Thread(target=digest_worker, name="digest", daemon=True).start()
+    else:
+        # Left over from a run with digests enabled
+        flush_digests()
+    catch_up_thread = threading.Thread(target=send_missed_mails, args=(mail_map,), name="catch-up", daemon=True)
+    catch_up_thread.start()
+    return catch_up_thread
+
+def shutdown(catch_up_thread=None):
+    stop_requested.set()
+    if catch_up_thread is not None:
+        # Lets the catch-up finish the file it is on, it stops before the next one
+        catch_up_thread.join(5)
     save_data()
-    sys.exit(0)
+    flush_digests()
+    stop_delivery_workers()
 
 if __name__ == "__main__":
     signal.signal(signal.SIGINT, exit_gracefully)
@@ -278,6 +1524,8 @@ if __name__ == "__main__":
     if not os.path.exists(MAIL_MAP_FILE):
         logging.warning(f"No mail_map configuration file found. Please add the file here: {MAIL_MAP_FILE}")
     mail_map = load_mail_map(mail_map)
-    load_data()
-    send_missed_mails(mail_map)
-    watch(mail_map)
+    catch_up_thread = start(mail_map)
+    try:
+        watch(mail_map)
+    finally:
+        shutdown(catch_up_thread)